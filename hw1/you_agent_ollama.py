@@ -4,13 +4,16 @@ import os
 from typing import List
 from pydantic import BaseModel
 from crewai import Agent, Task, LLM
+from llm_cache import cached_completion  # opt-in answer cache (LLM_CACHE=1)
 
 # Make sure `ollama serve` is running and you have the model pulled (e.g., `ollama pull deepseek-r1`)
 # Point CrewAI/LiteLLM at your local Ollama
+LLM_MODEL = "ollama/deepseek-r1"
+LLM_TEMPERATURE = 0.3
 llm = LLM(
-    model="ollama/deepseek-r1",           # provider/model together
+    model=LLM_MODEL,                      # provider/model together
     base_url="http://localhost:11434",    # Ollama default
-    temperature=0.3,
+    temperature=LLM_TEMPERATURE,
 )
 
 # ---- Your persona (edit these) ----------------------------------------------
@@ -104,12 +107,18 @@ task_cover_note = Task(
     agent=you_agent,
 )
 
+def run_task(task: Task) -> str:
+    """Run a task as you_agent; with LLM_CACHE=1 a repeated persona+task reuses the stored answer."""
+    prompt = f"{task.description}\n\nExpected output: {task.expected_output}"
+    return cached_completion(LLM_MODEL, LLM_TEMPERATURE, you_agent.backstory, prompt,
+                             lambda: str(task.execute_sync(agent=you_agent)))
+
 if __name__ == "__main__":
 
     # run the first task
-    about = task_about_me.execute_sync(agent=you_agent)
+    about = run_task(task_about_me)
 
-    # note  = task_cover_note.execute_sync(agent=you_agent)
+    # note  = run_task(task_cover_note)
 
     print("\n=== ABOUT ME ===\n")
     print(about)
@@ -2,25 +2,75 @@
 # Submission-ready: CrewAI-style persona + Anthropic via LangChain, parsed to str.
 # Env needed: ANTHROPIC_API_KEY, DOMAIN_NAME
 # Certs in CWD: ./fullchain.pem ./privkey.pem
+#
+# Optional env:
+#   NANDA_ASYNC=1               serve through the async improver (concurrent, batched, coalesced)
+#   NANDA_MAX_CONCURRENCY=4     max LLM calls in flight
+#   NANDA_BATCH_WINDOW_MS=20    how long to gather messages into one chain.abatch
+#   NANDA_MAX_RETRIES=4         retries on rate limits / overload, with exponential backoff
+#   NANDA_LLM=stub              offline stub LLM instead of Anthropic (NANDA_STUB_LATENCY_MS=300)
+#
+# Offline check (no API key, no NANDA server):
+#   NANDA_LLM=stub python you_agent_nanda.py --offline "hi" "hi" "what do you work on?"
 
+import asyncio
 import os
-from nanda_adapter import NANDA
-from langchain_anthropic import ChatAnthropic
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 
 # Reuse your HW1 persona
 from you_agent_ollama import Persona, persona_prompt
+from llm_cache import cached_completion, get_cache  # opt-in answer cache (LLM_CACHE=1)
 
-def create_you_agent_improvement():
+MODEL = "claude-3-haiku-20240307"
+TEMPERATURE = 0.3
+
+NANDA_LLM = os.getenv("NANDA_LLM", "anthropic")
+NANDA_STUB_LATENCY_MS = float(os.getenv("NANDA_STUB_LATENCY_MS", "300"))
+NANDA_MAX_CONCURRENCY = int(os.getenv("NANDA_MAX_CONCURRENCY", "4"))
+NANDA_BATCH_WINDOW_MS = float(os.getenv("NANDA_BATCH_WINDOW_MS", "20"))
+NANDA_MAX_RETRIES = int(os.getenv("NANDA_MAX_RETRIES", "4"))
+
+def build_stub_llm(persona: Persona):
+    """Offline stand-in for the chat model: answers after a fixed delay, no network."""
+    delay = NANDA_STUB_LATENCY_MS / 1000
+
+    def reply(prompt_value) -> AIMessage:
+        message = prompt_value.to_messages()[-1].content
+        return AIMessage(content=f"[stub] {persona.name} here. You said: {message}")
+
+    def sync_reply(prompt_value) -> AIMessage:
+        time.sleep(delay)
+        return reply(prompt_value)
+
+    async def async_reply(prompt_value) -> AIMessage:
+        await asyncio.sleep(delay)
+        return reply(prompt_value)
+
+    return RunnableLambda(sync_reply, afunc=async_reply, name="stub_llm")
+
+def build_chain():
+    """Persona prompt | LLM | StrOutputParser, plus the system prompt used as cache key."""
     YOU = Persona()
 
-    # Anthropic LLM (Haiku) via LangChain
-    llm = ChatAnthropic(
-        api_key=os.getenv("ANTHROPIC_API_KEY"),
-        model="claude-3-haiku-20240307",
-        temperature=0.3,
-    )
+    if NANDA_LLM == "stub":
+        llm = build_stub_llm(YOU)
+    else:
+        from langchain_anthropic import ChatAnthropic
+
+        # Anthropic LLM (Haiku) via LangChain
+        llm = ChatAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            model=MODEL,
+            temperature=TEMPERATURE,
+        )
 
     # System prompt pins your persona
     system_prompt = (
@@ -36,24 +86,196 @@ def create_you_agent_improvement():
         ("system", system_prompt),
         ("human", "{message}")
     ])
-    chain = prompt | llm | StrOutputParser()
+    return prompt | llm | StrOutputParser(), system_prompt
+
+def create_you_agent_improvement():
+    chain, system_prompt = build_chain()
 
     def improve(message_text: str) -> str:
         try:
-            text = chain.invoke({"message": message_text})
+            text = cached_completion(MODEL, TEMPERATURE, system_prompt, message_text,
+                                     lambda: chain.invoke({"message": message_text}))
+            return text.strip() if isinstance(text, str) else str(text)
+        except Exception as e:
+            # Always return a string so the adapter never sends non-text
+            return f"Sorry—error: {type(e).__name__}: {e}"
+
+    return improve
+
+# ---- Async variant ----------------------------------------------------------
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERRORS = {"RateLimitError", "OverloadedError", "APITimeoutError", "APIConnectionError",
+                    "InternalServerError"}
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, overload and transient server/network errors from the Anthropic SDK."""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS or type(exc).__name__ in RETRYABLE_ERRORS
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 20.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class AsyncImprover:
+    """Async improve(): bounded concurrency, coalescing, micro-batching and retries.
+
+    - Identical messages already in flight share one LLM call.
+    - Messages arriving within batch_window_ms of each other go to the model
+      together via chain.abatch (at most max_concurrency per batch).
+    - At most max_concurrency LLM calls run at once across all batches.
+    - Rate-limit / overload errors are retried with exponential backoff.
+    """
+
+    def __init__(self, chain, system_prompt: str, max_concurrency: int = NANDA_MAX_CONCURRENCY,
+                 batch_window_ms: float = NANDA_BATCH_WINDOW_MS, max_retries: int = NANDA_MAX_RETRIES):
+        self.chain = chain
+        self.system_prompt = system_prompt
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_window = batch_window_ms / 1000
+        self.max_retries = max_retries
+        self.stats = {"requests": 0, "coalesced": 0, "cache_hits": 0, "batches": 0,
+                      "llm_calls": 0, "retries": 0, "errors": 0}
+        # Created lazily so they bind to the loop the improver runs on
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slot_lock: Optional[asyncio.Lock] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def __call__(self, message_text: str) -> str:
+        self.stats["requests"] += 1
+        try:
+            text = await self.ainvoke(message_text)
             return text.strip() if isinstance(text, str) else str(text)
         except Exception as e:
+            self.stats["errors"] += 1
             # Always return a string so the adapter never sends non-text
             return f"Sorry—error: {type(e).__name__}: {e}"
 
+    async def ainvoke(self, message_text: str) -> str:
+        """LLM answer for one message (raises on failure)."""
+        cache = get_cache()
+        if cache is not None:
+            hit = await asyncio.to_thread(cache.get, MODEL, TEMPERATURE, self.system_prompt, message_text)
+            if hit is not None:
+                self.stats["cache_hits"] += 1
+                return hit
+
+        fut = self._inflight.get(message_text)
+        if fut is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(fut)
+
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._slot_lock = asyncio.Lock()
+        fut = loop.create_future()
+        self._inflight[message_text] = fut
+        self._pending.append((message_text, fut))
+        if len(self._pending) >= self.max_concurrency:
+            self._flush_now()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush_now)
+        try:
+            text = await asyncio.shield(fut)
+        finally:
+            self._inflight.pop(message_text, None)
+        if cache is not None and text.strip():
+            await asyncio.to_thread(cache.put, MODEL, TEMPERATURE, self.system_prompt, message_text, text)
+        return text
+
+    def _flush_now(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Take every slot this batch needs before starting; one batch acquires at a time
+        async with self._slot_lock:
+            for _ in batch:
+                await self._slots.acquire()
+        try:
+            self.stats["batches"] += 1
+            todo = batch
+            for attempt in range(self.max_retries + 1):
+                self.stats["llm_calls"] += len(todo)
+                results = await self.chain.abatch(
+                    [{"message": text} for text, _ in todo],
+                    config={"max_concurrency": self.max_concurrency},
+                    return_exceptions=True,
+                )
+                retry = []
+                for (text, fut), result in zip(todo, results):
+                    if fut.done():
+                        continue
+                    if not isinstance(result, Exception):
+                        fut.set_result(result)
+                    elif is_retryable(result) and attempt < self.max_retries:
+                        retry.append((text, fut))
+                    else:
+                        fut.set_exception(result)
+                if not retry:
+                    break
+                self.stats["retries"] += len(retry)
+                await asyncio.sleep(backoff_delay(attempt))
+                todo = retry
+        except BaseException as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e if isinstance(e, Exception) else RuntimeError("batch cancelled"))
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            for _ in batch:
+                self._slots.release()
+
+def create_you_agent_improvement_async() -> AsyncImprover:
+    """Async counterpart of create_you_agent_improvement: `await improver(message)`."""
+    chain, system_prompt = build_chain()
+    return AsyncImprover(chain, system_prompt)
+
+def run_on_background_loop(improver: AsyncImprover):
+    """Sync improve() for the adapter, backed by one event loop in a daemon thread.
+
+    Calls from the adapter's request threads all land on the same loop, so
+    they share the improver's batching, coalescing and concurrency limit.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="nanda-improver", daemon=True).start()
+
+    def improve(message_text: str) -> str:
+        return asyncio.run_coroutine_threadsafe(improver(message_text), loop).result()
+
     return improve
 
+async def _offline_demo(messages: List[str]) -> None:
+    improver = create_you_agent_improvement_async()
+    start = time.perf_counter()
+    replies = await asyncio.gather(*(improver(m) for m in messages))
+    elapsed = time.perf_counter() - start
+    for message, reply in zip(messages, replies):
+        print(f"> {message}\n{reply}\n")
+    print(f"{len(messages)} messages in {elapsed:.2f}s  {improver.stats}")
+
 def main():
-    NANDA(create_you_agent_improvement()).start_server_api(
+    from nanda_adapter import NANDA
+
+    if os.getenv("NANDA_ASYNC", "0") == "1":
+        improve = run_on_background_loop(create_you_agent_improvement_async())
+    else:
+        improve = create_you_agent_improvement()
+    NANDA(improve).start_server_api(
         os.getenv("ANTHROPIC_API_KEY"),
         os.getenv("DOMAIN_NAME"),
     )
 
 if __name__ == "__main__":
-    main()
-
+    if sys.argv[1:2] == ["--offline"]:
+        asyncio.run(_offline_demo(sys.argv[2:] or ["Hi!", "Hi!", "What are you working on?"]))
+    else:
+        main()
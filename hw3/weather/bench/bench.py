@@ -0,0 +1,238 @@
+"""Load test for the weather MCP server over Streamable HTTP.
+
+Starts the fake NWS API (fake_nws.py) and weather.py in HTTP mode pointed at
+it, then runs N concurrent MCP clients, each with its own session, calling a
+tool in a loop. Reports p50/p95/p99 latency, requests/second, errors and how
+many requests reached the upstream API.
+
+Run (from hw3/weather):
+  uv run python bench/bench.py --clients 32 --duration 20
+  uv run python bench/bench.py --clients 64 --tool mix --locations 500 --nws-delay-ms 120
+  uv run python bench/bench.py --url http://127.0.0.1:8000/mcp --clients 16   # existing server
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+BENCH_DIR = Path(__file__).resolve().parent
+WEATHER_PY = BENCH_DIR.parent / "src" / "weather.py"
+STATES = ["IL", "CA", "NY", "TX", "FL", "WA", "CO", "MA", "GA", "AZ"]
+
+
+@dataclass
+class Results:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    error_samples: list[str] = field(default_factory=list)
+
+    def record_error(self, message: str) -> None:
+        self.errors += 1
+        if len(self.error_samples) < 5:
+            self.error_samples.append(message)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{proc.args} exited with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port} after {timeout:.0f}s")
+
+
+def make_coords(locations: int, seed: int) -> list[tuple[float, float]]:
+    """Points spread over the continental US; a small pool exercises the caches."""
+    rng = random.Random(seed)
+    return [(round(rng.uniform(30, 47), 4), round(rng.uniform(-120, -75), 4)) for _ in range(max(1, locations))]
+
+
+def make_workload(tool: str, coords: list[tuple[float, float]], seed: int):
+    """Return a callable giving the next (tool name, arguments) for one client."""
+    rng = random.Random(seed)
+
+    def forecast():
+        lat, lon = rng.choice(coords)
+        return "get_forecast", {"latitude": lat, "longitude": lon}
+
+    def alerts():
+        return "get_alerts", {"state": rng.choice(STATES)}
+
+    def forecasts():
+        picks = rng.sample(coords, min(5, len(coords)))
+        return "get_forecasts", {"locations": [{"latitude": lat, "longitude": lon} for lat, lon in picks]}
+
+    if tool == "mix":
+        return lambda: rng.choice([forecast, forecast, alerts, forecasts])()
+    return {"get_forecast": forecast, "get_alerts": alerts, "get_forecasts": forecasts}[tool]
+
+
+async def run_client(url: str, next_call, deadline: float, max_requests: int | None,
+                     warmup: int, results: Results) -> None:
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for _ in range(warmup):
+                name, args = next_call()
+                await session.call_tool(name, args)
+
+            done = 0
+            while time.monotonic() < deadline and (max_requests is None or done < max_requests):
+                name, args = next_call()
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(name, args)
+                except Exception as e:
+                    results.record_error(f"{type(e).__name__}: {e}")
+                else:
+                    results.latencies.append(time.perf_counter() - start)
+                    text = result.content[0].text if result.content else ""
+                    if result.isError or text.startswith(("Unable to fetch", "Error:")):
+                        results.record_error(f"{name}: {text[:120]}")
+                done += 1
+
+
+async def run_load(url: str, clients: int, duration: float, requests: int | None,
+                   tool: str, locations: int, warmup: int, seed: int) -> tuple[Results, float]:
+    results = Results()
+    deadline = time.monotonic() + (duration if requests is None else 10 ** 9)
+    coords = make_coords(locations, seed)
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for i in range(clients):
+            tg.start_soon(run_client, url, make_workload(tool, coords, seed + i), deadline,
+                          requests, warmup, results)
+    return results, time.perf_counter() - start
+
+
+def upstream_stats(nws_base: str | None, reset: bool = False) -> dict | None:
+    if not nws_base:
+        return None
+    try:
+        r = httpx.request("POST" if reset else "GET", f"{nws_base}/_stats", timeout=5)
+        return r.json()
+    except (httpx.HTTPError, ValueError):
+        return None  # not the fake server
+
+
+def report(results: Results, elapsed: float, upstream: dict | None, args) -> dict:
+    lat = sorted(results.latencies)
+    summary = {
+        "tool": args.tool,
+        "clients": args.clients,
+        "requests": len(lat),
+        "errors": results.errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 1),
+        "p95_ms": round(percentile(lat, 95) * 1000, 1),
+        "p99_ms": round(percentile(lat, 99) * 1000, 1),
+        "max_ms": round(lat[-1] * 1000, 1) if lat else float("nan"),
+        "mean_ms": round(sum(lat) / len(lat) * 1000, 1) if lat else float("nan"),
+        "upstream": upstream,
+    }
+    if args.json:
+        print(json.dumps(summary))
+        return summary
+
+    print(f"\n{summary['tool']}  clients={summary['clients']}  requests={summary['requests']}  "
+          f"errors={summary['errors']}  elapsed={summary['elapsed_s']}s")
+    print(f"  throughput  {summary['rps']} req/s")
+    print(f"  latency ms  p50={summary['p50_ms']}  p95={summary['p95_ms']}  p99={summary['p99_ms']}  "
+          f"max={summary['max_ms']}  mean={summary['mean_ms']}")
+    if upstream is not None:
+        print(f"  upstream    {upstream}")
+    for sample in results.error_samples:
+        print(f"  error       {sample}")
+    return summary
+
+
+def _parse_args():
+    p = argparse.ArgumentParser(description="Load test the weather MCP server over Streamable HTTP")
+    p.add_argument("--url", help="MCP endpoint of a running server (default: start one)")
+    p.add_argument("--nws-base", help="Upstream API for the started server (default: start fake_nws.py)")
+    p.add_argument("--clients", type=int, default=16, help="Concurrent MCP sessions")
+    p.add_argument("--duration", type=float, default=10.0, help="Seconds to run (ignored with --requests)")
+    p.add_argument("--requests", type=int, default=None, help="Requests per client instead of a duration")
+    p.add_argument("--warmup", type=int, default=2, help="Untimed requests per client before measuring")
+    p.add_argument("--tool", choices=["get_forecast", "get_alerts", "get_forecasts", "mix"], default="get_forecast")
+    p.add_argument("--locations", type=int, default=50, help="Distinct coordinates in the workload")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--nws-delay-ms", type=float, default=50.0, help="Fake NWS latency")
+    p.add_argument("--nws-jitter-ms", type=float, default=20.0)
+    p.add_argument("--nws-error-rate", type=float, default=0.0)
+    p.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                   help="Extra env for the started server, e.g. NWS_CACHE=0 (repeatable)")
+    p.add_argument("--json", action="store_true", help="Print one JSON summary line")
+    return p.parse_args()
+
+
+def main():
+    args = _parse_args()
+    procs: list[subprocess.Popen] = []
+    nws_base = args.nws_base
+    url = args.url
+    try:
+        if url is None:
+            if nws_base is None:
+                nws_port = free_port()
+                procs.append(subprocess.Popen([
+                    sys.executable, str(BENCH_DIR / "fake_nws.py"), "--port", str(nws_port),
+                    "--delay-ms", str(args.nws_delay_ms), "--jitter-ms", str(args.nws_jitter_ms),
+                    "--error-rate", str(args.nws_error_rate), "--seed", str(args.seed),
+                ]))
+                wait_for_port(nws_port, procs[-1])
+                nws_base = f"http://127.0.0.1:{nws_port}"
+
+            port = free_port()
+            env = dict(os.environ, MCP_TRANSPORT="http", PORT=str(port), NWS_API_BASE=nws_base)
+            env.update(kv.split("=", 1) for kv in args.server_env)
+            procs.append(subprocess.Popen([sys.executable, str(WEATHER_PY)], env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            wait_for_port(port, procs[-1])
+            url = f"http://127.0.0.1:{port}/mcp"
+
+        upstream_stats(nws_base, reset=True)
+        results, elapsed = anyio.run(run_load, url, args.clients, args.duration, args.requests,
+                                     args.tool, args.locations, args.warmup, args.seed)
+        report(results, elapsed, upstream_stats(nws_base), args)
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":
+    main()
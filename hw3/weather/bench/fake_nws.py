@@ -0,0 +1,117 @@
+"""Local stand-in for api.weather.gov, serving the recorded fixtures in ./fixtures.
+
+Serves the three endpoints weather.py uses:
+  /points/{lat},{lon}                      -> fixtures/points.json (grid derived from the coordinates)
+  /gridpoints/{office}/{x},{y}/forecast    -> fixtures/forecast.json
+  /alerts/active/area/{state}              -> fixtures/alerts.json
+
+Responses carry Cache-Control max-age and an ETag (If-None-Match gets a 304),
+like the real API, so the server-side cache behaves as it would in production.
+GET /_stats returns per-endpoint request counts; POST /_stats resets them.
+
+Run:
+  python bench/fake_nws.py --port 8765 --delay-ms 80 --jitter-ms 40 --error-rate 0.01
+  NWS_API_BASE=http://127.0.0.1:8765 MCP_TRANSPORT=http python src/weather.py
+"""
+from collections import Counter
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+import uvicorn
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def load_fixture(name: str) -> dict:
+    with open(FIXTURES_DIR / f"{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def grid_for(lat: float, lon: float) -> tuple[int, int]:
+    """Map coordinates onto a ~2.5 km grid, so nearby points share a forecast like on NWS."""
+    return int((lon + 180) * 40) % 200, int((lat + 90) * 40) % 200
+
+
+def create_app(delay_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+               max_age: int = 60, points_max_age: int = 3600, seed: int | None = None) -> Starlette:
+    points = load_fixture("points")
+    forecast_body = json.dumps(load_fixture("forecast")).encode()
+    alerts = load_fixture("alerts")
+    rng = random.Random(seed)
+    stats: Counter = Counter()
+
+    async def respond(request: Request, endpoint: str, body: bytes, max_age: int) -> Response:
+        stats[endpoint] += 1
+        delay = delay_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"status": 503, "title": "Service Unavailable", "detail": "Injected error"}, status_code=503)
+
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/geo+json", headers=headers)
+
+    async def get_points(request: Request) -> Response:
+        try:
+            lat, lon = (float(v) for v in request.path_params["coords"].split(","))
+        except ValueError:
+            return JSONResponse({"status": 400, "title": "Invalid Parameter"}, status_code=400)
+        x, y = grid_for(lat, lon)
+        base = str(request.base_url).rstrip("/")
+        grid = f"{base}/gridpoints/LOT/{x},{y}"
+        props = dict(points["properties"], gridX=x, gridY=y, forecast=f"{grid}/forecast",
+                     forecastHourly=f"{grid}/forecast/hourly", forecastGridData=grid)
+        body = json.dumps(dict(points, properties=props)).encode()
+        return await respond(request, "points", body, points_max_age)
+
+    async def get_forecast(request: Request) -> Response:
+        return await respond(request, "forecast", forecast_body, max_age)
+
+    async def get_alerts(request: Request) -> Response:
+        state = request.path_params["state"].upper()
+        body = json.dumps(dict(alerts, title=f"Current watches, warnings, and advisories for {state}")).encode()
+        return await respond(request, "alerts", body, max_age)
+
+    async def get_stats(request: Request) -> Response:
+        if request.method == "POST":
+            stats.clear()
+        return JSONResponse(dict(stats))
+
+    return Starlette(routes=[
+        Route("/points/{coords}", get_points),
+        Route("/gridpoints/{office}/{grid}/forecast", get_forecast),
+        Route("/alerts/active/area/{state}", get_alerts),
+        Route("/_stats", get_stats, methods=["GET", "POST"]),
+    ])
+
+
+def _parse_args():
+    p = argparse.ArgumentParser(description="Fake NWS API serving recorded fixtures")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--delay-ms", type=float, default=0.0, help="Added latency per request")
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the delay")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    p.add_argument("--max-age", type=int, default=60, help="Cache-Control max-age for forecasts/alerts")
+    p.add_argument("--points-max-age", type=int, default=3600, help="Cache-Control max-age for /points")
+    p.add_argument("--seed", type=int, default=None)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    app = create_app(args.delay_ms, args.jitter_ms, args.error_rate, args.max_age, args.points_max_age, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
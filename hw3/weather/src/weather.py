@@ -1,6 +1,15 @@
-from typing import Any
+from typing import Any, Awaitable, Callable, Literal
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import importlib.util
+import json
 import os
+import time
+import anyio
 import httpx
+from pydantic import BaseModel
 from mcp.server.fastmcp import FastMCP
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
@@ -9,22 +18,183 @@ import uvicorn
 mcp = FastMCP("weather")
 
 # Constants
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.getenv("NWS_API_BASE", "https://api.weather.gov").rstrip("/")
 USER_AGENT = "weather-app/1.0"
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
+# Shared HTTP client settings (override via env)
+NWS_HTTP2 = os.getenv("NWS_HTTP2", "1") != "0"  # needs the h2 package (httpx[http2])
+NWS_MAX_CONNECTIONS = int(os.getenv("NWS_MAX_CONNECTIONS", "100"))
+NWS_MAX_KEEPALIVE = int(os.getenv("NWS_MAX_KEEPALIVE", "20"))
+NWS_KEEPALIVE_EXPIRY = float(os.getenv("NWS_KEEPALIVE_EXPIRY", "30"))
+NWS_TIMEOUT = float(os.getenv("NWS_TIMEOUT", "30"))
+NWS_CONNECT_TIMEOUT = float(os.getenv("NWS_CONNECT_TIMEOUT", "10"))
+
+# Caching: points -> forecast URL memo (grid mappings rarely change) and a
+# short-lived response cache for forecasts/alerts that follows Cache-Control
+NWS_POINTS_TTL = float(os.getenv("NWS_POINTS_TTL", "86400"))
+NWS_DEFAULT_TTL = float(os.getenv("NWS_DEFAULT_TTL", "60"))  # when upstream sends no freshness info
+NWS_CACHE_MAX_ENTRIES = int(os.getenv("NWS_CACHE_MAX_ENTRIES", "1024"))
+NWS_CACHE = os.getenv("NWS_CACHE", "1") != "0"
+
+# Batch tools: concurrent upstream calls per tool call, and max items per call
+NWS_BATCH_CONCURRENCY = int(os.getenv("NWS_BATCH_CONCURRENCY", "8"))
+NWS_BATCH_MAX_ITEMS = int(os.getenv("NWS_BATCH_MAX_ITEMS", "50"))
+
+# Fields returned by output="json" when the caller doesn't pick any
+ALERT_FIELDS = ("event", "severity", "urgency", "areaDesc", "headline", "effective", "expires")
+FORECAST_FIELDS = ("name", "startTime", "temperature", "temperatureUnit", "windSpeed", "windDirection", "shortForecast")
+FORECAST_PERIODS = 5
+
+_http_client: httpx.AsyncClient | None = None
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the process-wide NWS client: keep-alive pool, HTTP/2 when h2 is installed."""
+    return httpx.AsyncClient(
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/geo+json"
+        },
+        http2=NWS_HTTP2 and importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=NWS_MAX_CONNECTIONS,
+            max_keepalive_connections=NWS_MAX_KEEPALIVE,
+            keepalive_expiry=NWS_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(NWS_TIMEOUT, connect=NWS_CONNECT_TIMEOUT),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client; created on first use if the server lifespan didn't create it."""
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+@asynccontextmanager
+async def http_client_lifespan():
+    """Open the shared client at server startup and close its connections at shutdown."""
+    global _http_client
+    _http_client = create_http_client()
+    try:
+        yield _http_client
+    finally:
+        client, _http_client = _http_client, None
+        await client.aclose()
+
+@dataclass
+class CachedResponse:
+    data: dict[str, Any]
+    expires_at: float  # time.monotonic() deadline
+    etag: str | None = None
+    last_modified: str | None = None
+
+class LRUCache(OrderedDict):
+    """OrderedDict capped at max_entries, evicting the least recently used key."""
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def lookup(self, key):
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def store(self, key, value) -> None:
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+_response_cache = LRUCache(NWS_CACHE_MAX_ENTRIES)
+_points_cache = LRUCache(NWS_CACHE_MAX_ENTRIES)
+CACHE_STATS = {"hits": 0, "misses": 0, "revalidated": 0, "stale_served": 0, "points_hits": 0}
+
+def freshness_seconds(headers: httpx.Headers) -> float | None:
+    """Seconds a response stays fresh per Cache-Control/Expires; None means don't store."""
+    directives = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0  # store, but revalidate every time
+    age = float(headers.get("Age", "0") or 0)
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return max(0.0, float(directives[name]) - age)
+    if "Expires" in headers:
         try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+            expires = parsedate_to_datetime(headers["Expires"])
+            date = parsedate_to_datetime(headers["Date"]) if "Date" in headers else None
+            now = date.timestamp() if date else time.time()
+            return max(0.0, expires.timestamp() - now)
+        except (TypeError, ValueError):
+            return 0.0  # invalid Expires means already expired
+    return NWS_DEFAULT_TTL
+
+async def make_nws_request(url: str, use_cache: bool = True) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling.
+
+    Fresh cached responses are returned without a request; stale ones are
+    revalidated with If-None-Match/If-Modified-Since, and served as a fallback
+    if the upstream call fails.
+    """
+    use_cache = use_cache and NWS_CACHE
+    entry = _response_cache.lookup(url) if use_cache else None
+    if entry and entry.expires_at > time.monotonic():
+        CACHE_STATS["hits"] += 1
+        return entry.data
+
+    headers = {}
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    try:
+        response = await get_http_client().get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            CACHE_STATS["revalidated"] += 1
+            entry.expires_at = time.monotonic() + (freshness_seconds(response.headers) or 0.0)
+            return entry.data
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        if entry:
+            CACHE_STATS["stale_served"] += 1
+            return entry.data
+        return None
+
+    if use_cache:
+        CACHE_STATS["misses"] += 1
+        ttl = freshness_seconds(response.headers)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if ttl is not None and (ttl > 0 or etag or last_modified):
+            _response_cache.store(url, CachedResponse(data, time.monotonic() + ttl, etag, last_modified))
+    return data
+
+async def get_forecast_url(latitude: float, longitude: float) -> str | None:
+    """Resolve /points to the gridpoint forecast URL, memoized per ~11 m cell."""
+    key = (round(latitude, 4), round(longitude, 4))
+    cached = _points_cache.lookup(key) if NWS_CACHE else None
+    if cached and cached[1] > time.monotonic():
+        CACHE_STATS["points_hits"] += 1
+        return cached[0]
+
+    # NWS itself only accepts 4 decimal places on /points
+    points_url = f"{NWS_API_BASE}/points/{key[0]},{key[1]}"
+    points_data = await make_nws_request(points_url, use_cache=False)
+    if not points_data:
+        return cached[0] if cached else None
+
+    forecast_url = points_data["properties"]["forecast"]
+    if NWS_CACHE:
+        _points_cache.store(key, (forecast_url, time.monotonic() + NWS_POINTS_TTL))
+    return forecast_url
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
@@ -37,60 +207,241 @@ Description: {props.get('description', 'No description available')}
 Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
+def page_bounds(total: int, limit: int | None, offset: int) -> tuple[int, int]:
+    """Clamp limit/offset to a [start, end) slice of `total` items."""
+    start = min(max(0, offset), total)
+    end = total if limit is None else min(total, start + max(0, limit))
+    return start, end
+
+def format_alerts(data: dict[str, Any] | None, limit: int | None = None, offset: int = 0) -> str:
+    """Format an /alerts response (or a failed fetch) for a state."""
+    if not data or "features" not in data:
+        return "Unable to fetch alerts or no alerts found."
+
+    if not data["features"]:
+        return "No active alerts for this state."
+
+    start, end = page_bounds(len(data["features"]), limit, offset)
+    alerts = [format_alert(feature) for feature in data["features"][start:end]]
+    if end < len(data["features"]):
+        alerts.append(f"\n({len(data['features']) - end} more alerts; use offset={end})")
+    return "\n---\n".join(alerts)
+
+def format_forecast(forecast_data: dict[str, Any], limit: int | None = None, offset: int = 0) -> str:
+    """Format the next periods of a gridpoint forecast response."""
+    periods = forecast_data["properties"]["periods"]
+    start, end = page_bounds(len(periods), FORECAST_PERIODS if limit is None else limit, offset)
+    forecasts = []
+    for period in periods[start:end]:  # Only show next 5 periods by default
+        forecast = f"""
+        {period['name']}:
+        Temperature: {period['temperature']}°{period['temperatureUnit']}
+        Wind: {period['windSpeed']} {period['windDirection']}
+        Forecast: {period['detailedForecast']}
+        """
+        forecasts.append(forecast)
+
+    return "\n---\n".join(forecasts)
+
+def select_page(items: list[dict], fields: list[str] | tuple[str, ...], limit: int | None, offset: int) -> dict[str, Any]:
+    """Pick `fields` from one page of items, with paging info for the next call."""
+    start, end = page_bounds(len(items), limit, offset)
+    return {
+        "total": len(items),
+        "offset": start,
+        "next_offset": end if end < len(items) else None,
+        "items": [{f: item[f] for f in fields if f in item} for item in items[start:end]],
+    }
+
+def alerts_json(data: dict[str, Any] | None, fields: list[str] | None = None,
+                limit: int | None = None, offset: int = 0) -> dict[str, Any]:
+    """Structured counterpart of format_alerts: selected alert properties only."""
+    if not data or "features" not in data:
+        return {"error": "Unable to fetch alerts or no alerts found."}
+    props = [feature["properties"] for feature in data["features"]]
+    return select_page(props, fields or ALERT_FIELDS, limit, offset)
+
+def forecast_json(forecast_data: dict[str, Any], fields: list[str] | None = None,
+                  limit: int | None = None, offset: int = 0) -> dict[str, Any]:
+    """Structured counterpart of format_forecast: selected period fields only."""
+    periods = forecast_data["properties"]["periods"]
+    return select_page(periods, fields or FORECAST_FIELDS, FORECAST_PERIODS if limit is None else limit, offset)
+
+def dump_json(obj: Any) -> str:
+    """Compact JSON for tool results (no whitespace, UTF-8 kept as is)."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+async def gather_bounded(fn: Callable[[Any], Awaitable[Any]], items: list, limit: int) -> list:
+    """Run fn over items concurrently, at most `limit` at a time.
+
+    Results keep the input order; an item that raised gets its exception
+    as its result instead of cancelling the others.
+    """
+    results: list[Any] = [None] * len(items)
+    semaphore = anyio.Semaphore(max(1, limit))
+
+    async def run(i: int, item: Any) -> None:
+        async with semaphore:
+            try:
+                results[i] = await fn(item)
+            except Exception as e:
+                results[i] = e
+
+    async with anyio.create_task_group() as tg:
+        for i, item in enumerate(items):
+            tg.start_soon(run, i, item)
+    return results
+
+def _error_text(exc: Exception) -> str:
+    return f"Error: {type(exc).__name__}: {exc}"
+
+class Location(BaseModel):
+    latitude: float
+    longitude: float
+
+OutputFormat = Literal["text", "json"]
+
 @mcp.tool()
-async def get_alerts(state: str) -> str:
+async def get_alerts(state: str, output: OutputFormat = "text", fields: list[str] | None = None,
+                     limit: int | None = None, offset: int = 0) -> str:
     """Get weather alerts for a US state.
 
     Args:
         state: Two-letter US state code (e.g. CA, NY)
+        output: "text" (default) or "json" for compact JSON with only `fields`
+        fields: Alert properties to return in JSON mode (default: event, severity,
+            urgency, areaDesc, headline, effective, expires)
+        limit: Max alerts to return (default: all)
+        offset: Index of the first alert to return; JSON results give `next_offset`
     """
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
     data = await make_nws_request(url)
+    if output == "json":
+        return dump_json(alerts_json(data, fields, limit, offset))
+    return format_alerts(data, limit, offset)
 
-    if not data or "features" not in data:
-        return "Unable to fetch alerts or no alerts found."
+@mcp.tool()
+async def get_alerts_many(states: list[str], output: OutputFormat = "text", fields: list[str] | None = None,
+                          limit: int | None = None) -> str:
+    """Get weather alerts for several US states in one call.
 
-    if not data["features"]:
-        return "No active alerts for this state."
+    States are fetched concurrently; each gets its own section, and a failure
+    for one state doesn't affect the others.
 
-    alerts = [format_alert(feature) for feature in data["features"]]
-    return "\n---\n".join(alerts)
+    Args:
+        states: Two-letter US state codes (e.g. ["CA", "NY"])
+        output: "text" (default) or "json" for a compact JSON list, one entry per state
+        fields: Alert properties to return in JSON mode (see get_alerts)
+        limit: Max alerts per state (default: all)
+    """
+    unique = list(dict.fromkeys(state.strip().upper() for state in states))
+    if len(unique) > NWS_BATCH_MAX_ITEMS:
+        return f"Too many states ({len(unique)}); the limit is {NWS_BATCH_MAX_ITEMS}."
+
+    urls = [f"{NWS_API_BASE}/alerts/active/area/{state}" for state in unique]
+    results = await gather_bounded(make_nws_request, urls, NWS_BATCH_CONCURRENCY)
+
+    if output == "json":
+        entries = []
+        for state, data in zip(unique, results):
+            body = {"error": _error_text(data)} if isinstance(data, Exception) else alerts_json(data, fields, limit)
+            entries.append({"state": state, **body})
+        return dump_json(entries)
+
+    sections = []
+    for state, data in zip(unique, results):
+        body = _error_text(data) if isinstance(data, Exception) else format_alerts(data, limit)
+        sections.append(f"=== {state} ===\n{body}")
+    return "\n\n".join(sections)
 
 @mcp.tool()
-async def get_forecast(latitude: float, longitude: float) -> str:
+async def get_forecast(latitude: float, longitude: float, output: OutputFormat = "text",
+                       fields: list[str] | None = None, limit: int | None = None, offset: int = 0) -> str:
     """Get weather forecast for a location.
 
     Args:
         latitude: Latitude of the location
         longitude: Longitude of the location
+        output: "text" (default) or "json" for compact JSON with only `fields`
+        fields: Period fields to return in JSON mode (default: name, startTime,
+            temperature, temperatureUnit, windSpeed, windDirection, shortForecast)
+        limit: Max periods to return (default: 5)
+        offset: Index of the first period to return; JSON results give `next_offset`
     """
-    # First get the forecast grid endpoint
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    # First get the forecast grid endpoint (memoized per location)
+    forecast_url = await get_forecast_url(latitude, longitude)
 
-    if not points_data:
-        return "Unable to fetch forecast data for this location."
+    if not forecast_url:
+        error = "Unable to fetch forecast data for this location."
+        return dump_json({"error": error}) if output == "json" else error
 
-    # Get the forecast URL from the points response
-    forecast_url = points_data["properties"]["forecast"]
     forecast_data = await make_nws_request(forecast_url)
 
     if not forecast_data:
-        return "Unable to fetch detailed forecast."
+        error = "Unable to fetch detailed forecast."
+        return dump_json({"error": error}) if output == "json" else error
+
+    if output == "json":
+        return dump_json(forecast_json(forecast_data, fields, limit, offset))
 
     # Format the periods into a readable forecast
-    periods = forecast_data["properties"]["periods"]
-    forecasts = []
-    for period in periods[:5]:  # Only show next 5 periods
-        forecast = f"""
-        {period['name']}:
-        Temperature: {period['temperature']}°{period['temperatureUnit']}
-        Wind: {period['windSpeed']} {period['windDirection']}
-        Forecast: {period['detailedForecast']}
-        """
-        forecasts.append(forecast)
+    return format_forecast(forecast_data, limit, offset)
 
-    return "\n---\n".join(forecasts)
+@mcp.tool()
+async def get_forecasts(locations: list[Location], output: OutputFormat = "text",
+                        fields: list[str] | None = None, limit: int | None = None) -> str:
+    """Get weather forecasts for several locations in one call.
+
+    Grid lookups and forecasts are fetched concurrently, and locations that
+    fall on the same NWS grid point share one forecast request. Each location
+    gets its own section with its own error, if any.
+
+    Args:
+        locations: List of {"latitude": ..., "longitude": ...} objects
+        output: "text" (default) or "json" for a compact JSON list, one entry per location
+        fields: Period fields to return in JSON mode (see get_forecast)
+        limit: Max periods per location (default: 5)
+    """
+    if len(locations) > NWS_BATCH_MAX_ITEMS:
+        return f"Too many locations ({len(locations)}); the limit is {NWS_BATCH_MAX_ITEMS}."
+
+    keys = [(round(loc.latitude, 4), round(loc.longitude, 4)) for loc in locations]
+    unique_keys = list(dict.fromkeys(keys))
+    resolved = await gather_bounded(lambda key: get_forecast_url(*key), unique_keys, NWS_BATCH_CONCURRENCY)
+    forecast_urls = dict(zip(unique_keys, resolved))
+
+    # Dedupe grid points shared by several locations
+    unique_urls = list(dict.fromkeys(u for u in resolved if isinstance(u, str)))
+    fetched = await gather_bounded(make_nws_request, unique_urls, NWS_BATCH_CONCURRENCY)
+    forecasts = dict(zip(unique_urls, fetched))
+
+    entries = []
+    for key in keys:
+        forecast_url = forecast_urls[key]
+        if isinstance(forecast_url, Exception):
+            body = _error_text(forecast_url)
+        elif not forecast_url:
+            body = "Unable to fetch forecast data for this location."
+        elif isinstance(forecasts[forecast_url], Exception):
+            body = _error_text(forecasts[forecast_url])
+        elif not forecasts[forecast_url]:
+            body = "Unable to fetch detailed forecast."
+        else:
+            try:
+                if output == "json":
+                    body = forecast_json(forecasts[forecast_url], fields, limit)
+                else:
+                    body = format_forecast(forecasts[forecast_url], limit)
+            except (KeyError, TypeError) as e:
+                body = _error_text(e)
+        entries.append((key, body))
+
+    if output == "json":
+        return dump_json([
+            {"latitude": lat, "longitude": lon, **(body if isinstance(body, dict) else {"error": body})}
+            for (lat, lon), body in entries
+        ])
+    return "\n\n".join(f"=== {lat}, {lon} ===\n{body}" for (lat, lon), body in entries)
 
 def main():
     # Default to stdio so Claude Desktop works out of the box.
@@ -107,11 +458,24 @@ def main():
             allow_methods=["GET", "POST", "OPTIONS"],
             allow_headers=["*"],
         )
+        # Run the shared NWS client alongside the MCP session manager
+        session_manager_lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            async with http_client_lifespan(), session_manager_lifespan(app):
+                yield
+
+        app.router.lifespan_context = lifespan
         # Bind to the port Smithery injects
         port = int(os.getenv("PORT", "8000"))
         uvicorn.run(app, host="0.0.0.0", port=port)
     else:
-        mcp.run(transport="stdio")
+        anyio.run(run_stdio)
+
+async def run_stdio():
+    async with http_client_lifespan():
+        await mcp.run_stdio_async()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+# llm_cache.py
+# Opt-in persistent cache for persona-agent LLM answers (SQLite, stdlib only).
+#
+# The persona prompt and task text barely change between runs, so re-asking
+# Ollama (tens of seconds for deepseek-r1 on CPU) or Anthropic is wasted work.
+# Answers are keyed on model, temperature, a hash of the system/persona prompt
+# and the task text.
+#
+# Env:
+#   LLM_CACHE=1                   enable (off by default)
+#   LLM_CACHE_PATH=...            default: ~/.cache/ai_studio/llm_cache.sqlite
+#   LLM_CACHE_TTL=604800          seconds an answer stays valid (0 = forever)
+#   LLM_CACHE_MAX_ENTRIES=1000    least recently used answers are evicted past this
+#   LLM_CACHE_MAX_MB=50           ... or past this much stored text
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+LLM_CACHE = os.getenv("LLM_CACHE", "0") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or os.path.expanduser("~/.cache/ai_studio/llm_cache.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite table of answers with TTL and LRU eviction by count and size."""
+
+    def __init__(self, path: str, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                model TEXT, temperature REAL, persona_hash TEXT, task TEXT,
+                response TEXT NOT NULL, size INTEGER NOT NULL,
+                created REAL NOT NULL, last_used REAL NOT NULL
+            )""")
+
+    @staticmethod
+    def key(model: str, temperature: float, system_prompt: str, task: str) -> str:
+        raw = json.dumps([model, round(float(temperature), 4), prompt_hash(system_prompt), task])
+        return prompt_hash(raw)
+
+    def get(self, model: str, temperature: float, system_prompt: str, task: str) -> Optional[str]:
+        key = self.key(model, temperature, system_prompt, task)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM answers WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl > 0 and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, model: str, temperature: float, system_prompt: str, task: str, response: str) -> None:
+        key = self.key(model, temperature, system_prompt, task)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, float(temperature), prompt_hash(system_prompt), task, response,
+                 len(response.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl > 0:
+            self._db.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk least recently used first until both limits hold
+        drop = []
+        for key, size in self._db.execute("SELECT key, size FROM answers ORDER BY last_used"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            drop.append((key,))
+            count -= 1
+            total -= size
+        self._db.executemany("DELETE FROM answers WHERE key = ?", drop)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM answers")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers").fetchone()
+        return {"path": self.path, "entries": count, "bytes": total,
+                "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Process-wide cache, or None unless LLM_CACHE=1."""
+    global _cache
+    if not LLM_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(LLM_CACHE_PATH)
+        return _cache
+
+
+def cached_completion(model: str, temperature: float, system_prompt: str, task: str,
+                      compute: Callable[[], str]) -> str:
+    """Return the cached answer for this prompt, or compute() and store it.
+
+    Exceptions from compute() propagate and nothing is stored, so errors are
+    never cached.
+    """
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    hit = cache.get(model, temperature, system_prompt, task)
+    if hit is not None:
+        return hit
+    response = compute()
+    if response and response.strip():
+        cache.put(model, temperature, system_prompt, task, response)
+    return response
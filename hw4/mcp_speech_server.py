@@ -4,29 +4,123 @@ MCP Speech Server — Kokoro-only (TTS) + Faster-Whisper (STT)
 Env knobs (optional):
   KOKORO_LANG_CODE=a    # 'a' American English
   KOKORO_VOICE=af_heart # default voice
+  KOKORO_LANG_CODES=    # extra languages whose pipelines are built at preload, e.g. a,b,e
+                        # (a request's lang_code defaults to its voice's first letter: bf_emma -> b)
+  KOKORO_PIPELINES_PER_LANG=1  # KPipelines per language (they share one model); round-robin per request
+  KOKORO_PRELOAD_VOICES=af_heart  # voices loaded into memory when tts is preloaded (comma-separated)
+  KOKORO_VOICE_CACHE_MB=64  # LRU-evict in-memory voice tensors (~0.5 MB each) beyond this size
   TTS_DOWNLOAD_DIR=out  # where files are saved when save_path is used
   TTS_FILE_BASE_URL=    # e.g. http://localhost:8787 to expose downloads
+                        # saved files are also readable as MCP resources: speech://files/<quoted rel path>
+  KOKORO_STREAM_SPLIT=  # regex used to cut text into streamed segments (default: sentences)
+  TTS_FORMAT=wav        # default synthesize_speech output: wav, flac or opus (Ogg/Opus)
+  TTS_CACHE=1           # 0 disables the synthesized-audio cache
+  TTS_CACHE_DIR=        # default: $TTS_DOWNLOAD_DIR/.tts_cache
+  TTS_CACHE_MAX_MB=256  # LRU-evict cached WAVs beyond this size
+  KOKORO_G2P_CACHE_SIZE=0     # e.g. 4096: memoize the phonemes of this many sentences in memory
+  KOKORO_SEGMENT_CACHE_MB=0   # e.g. 32: in-memory LRU of per-sentence audio, so repeated sentences skip Kokoro
+                              # (either one makes synthesize_speech synthesize sentence by sentence)
+  SPEECH_PRELOAD=       # tts, stt or all: load + warm models in the background at launch
+  FASTER_WHISPER_MODEL=small
+  FASTER_WHISPER_DEVICE=auto
+  FASTER_WHISPER_COMPUTE_TYPE=default  # e.g. int8 or float32 on CPU-only hosts
+  FASTER_WHISPER_THREADS=0             # CPU threads for faster-whisper (0 = library default)
+  STT_BATCH_SIZE=1      # >1 micro-batches concurrent short transcribe_audio calls that give a language
+  STT_BATCH_WINDOW_MS=20  # how long the first request of a batch waits for company
+  FASTER_WHISPER_WORKERS=1  # model workers; >1 lets transcribe_long_audio chunks run in parallel
+  STT_LONG_WORKERS=2    # chunks transcribed at once by transcribe_long_audio
+  VAD_THRESHOLD_DB=-45  # frames quieter than this (dBFS, or noise floor + 6 dB) count as silence
+  KOKORO_WORKERS=0      # >0 synthesizes sentences in parallel on this many worker processes
+  SPEECH_TIMINGS=0      # 1 adds per-request stage timings, RTF and peak RSS to tool results
+  SPEECH_BACKEND=real   # stub: tone/placeholder-text models, no downloads (benchmarks, CI)
+  STUB_LOAD_SEC=0.5     # stub model load time
+  STUB_TTS_RTF=0.05     # stub compute seconds per second of audio
+  STUB_STT_RTF=0.02
+  STT_MAX_CONCURRENCY=  # faster-whisper calls run at once (default FASTER_WHISPER_WORKERS)
+  TTS_MAX_CONCURRENCY=1 # Kokoro calls run at once
+  SPEECH_MAX_QUEUE=16   # calls allowed to wait per model; past that tools fail fast with "busy"
+  SPEECH_REQUEST_TIMEOUT_SEC=300  # per call, overridable with payload timeout_sec (0 = none)
+  SPEECH_JOB_CONCURRENCY=1  # background jobs (submit_job) running at once
+  SPEECH_JOB_MAX_QUEUED=100  # jobs allowed to wait; submit_job fails fast past this
+  SPEECH_JOB_HISTORY=200     # finished jobs kept in memory (all are also saved under $TTS_DOWNLOAD_DIR/jobs)
+  MCP_TRANSPORT=stdio   # http serves Streamable HTTP at http://HOST:PORT/mcp
+  HOST=127.0.0.1
+  PORT=8001
 
 Run:
   python mcp_speech_server.py
+  python mcp_speech_server.py --transport http --port 8001 --preload all   # one shared warm server
+  python mcp_speech_server.py --preload all --compute-type int8 --threads 4
+  python mcp_speech_server.py --backend stub
 """
 
 from __future__ import annotations
-import base64, io, os, sys, tempfile, contextlib
+import argparse, asyncio, atexit, base64, bisect, contextvars, hashlib, heapq, io, itertools, json, os, queue, re, struct, sys, threading, time, contextlib, unicodedata, uuid
+import multiprocessing as mp
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional, Tuple, List
+from functools import lru_cache
+from urllib.parse import quote, unquote
+from typing import Iterator, Optional, Tuple, List, Union
 
+import anyio
 import numpy as np
 import soundfile as sf
 
 # ---------- Config ----------
 KOKORO_LANG_CODE = os.getenv("KOKORO_LANG_CODE", "a")   # 'a' => American English
 KOKORO_DEFAULT_VOICE = os.getenv("KOKORO_VOICE", "af_heart")
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+KOKORO_LANG_CODES = os.getenv("KOKORO_LANG_CODES", "")
+KOKORO_PIPELINES_PER_LANG = int(os.getenv("KOKORO_PIPELINES_PER_LANG", "1"))
+KOKORO_PRELOAD_VOICES = os.getenv("KOKORO_PRELOAD_VOICES", KOKORO_DEFAULT_VOICE)
+KOKORO_VOICE_CACHE_BYTES = int(float(os.getenv("KOKORO_VOICE_CACHE_MB", "64")) * 1024 * 1024)
 TTS_DOWNLOAD_DIR = os.getenv("TTS_DOWNLOAD_DIR", "out")
 TTS_FILE_BASE_URL = os.getenv("TTS_FILE_BASE_URL")  # optional base URL for saved files
+KOKORO_SAMPLE_RATE = 24000  # kokoro default sample rate
+AUDIO_URI_PREFIX = "speech://files/"
+WHISPER_SAMPLE_RATE = 16000  # faster-whisper expects 16 kHz mono float32
+WHISPER_WINDOW_SEC = 30      # whisper decodes 30 s windows
+# streaming cuts at sentence ends so the first segment is short
+KOKORO_STREAM_SPLIT = os.getenv("KOKORO_STREAM_SPLIT", r"(?<=[.!?])\s+|\n+")
+TTS_FORMAT = os.getenv("TTS_FORMAT", "wav").lower()
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "1") != "0"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or os.path.join(TTS_DOWNLOAD_DIR, ".tts_cache")
+TTS_CACHE_MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", "256")) * 1024 * 1024)
+KOKORO_G2P_CACHE_SIZE = int(os.getenv("KOKORO_G2P_CACHE_SIZE", "0"))
+KOKORO_SEGMENT_CACHE_BYTES = int(float(os.getenv("KOKORO_SEGMENT_CACHE_MB", "0")) * 1024 * 1024)
+SPEECH_PRELOAD = os.getenv("SPEECH_PRELOAD", "")
+FASTER_WHISPER_MODEL = os.getenv("FASTER_WHISPER_MODEL", "small")
+FASTER_WHISPER_DEVICE = os.getenv("FASTER_WHISPER_DEVICE", "auto")
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "default")
+FASTER_WHISPER_THREADS = int(os.getenv("FASTER_WHISPER_THREADS", "0"))
+STT_BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", "1"))
+STT_BATCH_WINDOW_SEC = float(os.getenv("STT_BATCH_WINDOW_MS", "20")) / 1000.0
+FASTER_WHISPER_WORKERS = int(os.getenv("FASTER_WHISPER_WORKERS", "1"))
+STT_LONG_WORKERS = int(os.getenv("STT_LONG_WORKERS", "2"))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+VAD_FRAME_SEC = 0.03
+KOKORO_WORKERS = int(os.getenv("KOKORO_WORKERS", "0"))
+SPEECH_TIMINGS = os.getenv("SPEECH_TIMINGS", "0") == "1"
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "real")
+STUB_LOAD_SEC = float(os.getenv("STUB_LOAD_SEC", "0.5"))
+STUB_TTS_RTF = float(os.getenv("STUB_TTS_RTF", "0.05"))
+STUB_STT_RTF = float(os.getenv("STUB_STT_RTF", "0.02"))
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY") or FASTER_WHISPER_WORKERS)
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "1"))
+SPEECH_MAX_QUEUE = int(os.getenv("SPEECH_MAX_QUEUE", "16"))
+SPEECH_REQUEST_TIMEOUT_SEC = float(os.getenv("SPEECH_REQUEST_TIMEOUT_SEC", "300"))
+SPEECH_JOB_CONCURRENCY = int(os.getenv("SPEECH_JOB_CONCURRENCY", "1"))
+SPEECH_JOB_MAX_QUEUED = int(os.getenv("SPEECH_JOB_MAX_QUEUED", "100"))
+SPEECH_JOB_HISTORY = int(os.getenv("SPEECH_JOB_HISTORY", "200"))
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+HOST = os.getenv("HOST", "127.0.0.1")
+PORT = int(os.getenv("PORT", "8001"))
 
 # lazy caches
-_kokoro = None
+_kokoro: dict = {}  # lang_code -> KPipelines sharing one KModel
+_kokoro_pool: Optional[ProcessPoolExecutor] = None
 _faster = None
 
 # ---------- Quiet Kokoro's stdout to avoid corrupting JSON-RPC ----------
@@ -34,24 +128,40 @@ _faster = None
 def _quiet_stdout_to_stderr():
     """
     Redirect sys.stdout to sys.stderr within the block so any progress logs
-    (pip/spacy/hf) don't appear on MCP stdout.
+    (pip/spacy/hf) don't appear on MCP stdout. sys.stdout is process-global and
+    loads run on several threads at once, so the swap is refcounted: the first
+    entry redirects, the last exit restores (the stdio transport wrapped the
+    real stdout at startup, so JSON-RPC is unaffected either way).
     """
-    old = sys.stdout
+    global _quiet_depth, _quiet_saved
+    with _quiet_lock:
+        if _quiet_depth == 0:
+            _quiet_saved = sys.stdout
+            sys.stdout = sys.stderr
+        _quiet_depth += 1
     try:
-        sys.stdout = sys.stderr
         yield
     finally:
-        sys.stdout = old
+        with _quiet_lock:
+            _quiet_depth -= 1
+            if _quiet_depth == 0:
+                sys.stdout, _quiet_saved = _quiet_saved, None
+
+_quiet_lock = threading.Lock()
+_quiet_depth = 0
+_quiet_saved = None
 
 # ---------- MCP ----------
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 app = FastMCP("speech-kokoro")
 
 @dataclass
 class TranscribeInput:
     audio_b64: Optional[str] = None
     audio_path: Optional[str] = None
+    audio_uri: Optional[str] = None
     language: Optional[str] = None
+    timeout_sec: Optional[float] = None  # default SPEECH_REQUEST_TIMEOUT_SEC
 
 @dataclass
 class TranscribeOutput:
@@ -59,120 +169,2208 @@ class TranscribeOutput:
     language: Optional[str] = None
     duration_sec: Optional[float] = None
 
+@dataclass
+class LongTranscribeInput:
+    audio_b64: Optional[str] = None
+    audio_path: Optional[str] = None
+    audio_uri: Optional[str] = None
+    language: Optional[str] = None
+    max_chunk_sec: float = 30.0    # whisper's window; chunks are cut at the last pause before this
+    min_chunk_sec: float = 10.0
+    min_silence_ms: float = 300.0
+    workers: Optional[int] = None  # default STT_LONG_WORKERS
+    return_segments: bool = True
+    timeout_sec: Optional[float] = None  # default: no limit
+
 @dataclass
 class SynthesizeInput:
     text: str
     voice: Optional[str] = None
     rate: Optional[float] = None
     save_path: Optional[str] = None
+    return_audio: bool = True  # False: no audio_b64_wav, only audio_path/audio_uri
+    timeout_sec: Optional[float] = None  # default SPEECH_REQUEST_TIMEOUT_SEC
+    format: Optional[str] = None         # wav | flac | opus; default: save_path's extension, else TTS_FORMAT
+    sample_rate: Optional[int] = None    # output rate; default Kokoro's 24 kHz
+    lang_code: Optional[str] = None      # default: the voice's first letter, else KOKORO_LANG_CODE
+
+    def __post_init__(self):
+        self.lang_code = _lang_for(self.voice, self.lang_code)
+        # the save_path extension picks the codec when format isn't given, and must agree with it
+        ext = os.path.splitext(self.save_path or "")[1].lstrip(".").lower()
+        if ext and ext not in AUDIO_EXTENSIONS:
+            raise ValueError(f"save_path extension must be one of {sorted(AUDIO_EXTENSIONS)}")
+        self.format = (self.format or AUDIO_EXTENSIONS.get(ext) or TTS_FORMAT).lower()
+        if self.format not in AUDIO_FORMATS:
+            raise ValueError(f"format must be one of {sorted(AUDIO_FORMATS)}")
+        if ext and AUDIO_EXTENSIONS[ext] != self.format:
+            raise ValueError(f"save_path .{ext} doesn't match format {self.format!r}")
+        self.sample_rate = int(self.sample_rate or KOKORO_SAMPLE_RATE)
+        if not 8000 <= self.sample_rate <= 48000:
+            raise ValueError("sample_rate must be between 8000 and 48000")
+        if self.format == "opus" and self.sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"opus needs a sample_rate in {OPUS_SAMPLE_RATES}")
 
 @dataclass
 class SynthesizeOutput:
-    audio_b64_wav: str
     sample_rate: int
+    audio_b64_wav: Optional[str] = None  # format "wav"
+    audio_b64: Optional[str] = None      # any other format
+    format: str = "wav"
     audio_path: Optional[str] = None
     audio_url: Optional[str] = None
+    audio_uri: Optional[str] = None
+    cached: bool = False
 
 # ---------- helpers ----------
-def _safe_out_path(rel_path: str) -> str:
+def _safe_out_path(rel_path: str, create: bool = True) -> str:
     base = os.path.abspath(TTS_DOWNLOAD_DIR)
-    os.makedirs(base, exist_ok=True)
+    if create:
+        os.makedirs(base, exist_ok=True)
     rel_path = rel_path.lstrip("/\\")
     target = os.path.abspath(os.path.join(base, rel_path))
     if not (target == base or target.startswith(base + os.sep)):
         raise ValueError("save_path escapes TTS_DOWNLOAD_DIR")
-    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if create:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
     return target
 
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+def _saved_file_fields(target: str) -> dict:
+    """audio_path, audio_uri (MCP resource) and audio_url (if TTS_FILE_BASE_URL) for a saved file."""
+    rel = os.path.relpath(target, start=os.path.abspath(TTS_DOWNLOAD_DIR)).replace(os.sep, "/")
+    fields = {"audio_path": target, "audio_uri": AUDIO_URI_PREFIX + quote(rel, safe="")}
+    if TTS_FILE_BASE_URL:
+        fields["audio_url"] = TTS_FILE_BASE_URL.rstrip("/") + "/" + rel
+    return fields
+
+def _path_from_audio_uri(uri: str) -> str:
+    if not uri.startswith(AUDIO_URI_PREFIX):
+        raise ValueError(f"audio_uri must start with {AUDIO_URI_PREFIX}")
+    return _safe_out_path(unquote(uri[len(AUDIO_URI_PREFIX):]), create=False)
+
+# output format -> (soundfile format, subtype, file extension)
+AUDIO_FORMATS = {
+    "wav": ("WAV", "PCM_16", "wav"),
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "opus": ("OGG", "OPUS", "opus"),
+}
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+AUDIO_EXTENSIONS = {ext: fmt for fmt, (_, _, ext) in AUDIO_FORMATS.items()}
+AUDIO_EXTENSIONS["ogg"] = "opus"
+
+def _pcm16(audio: np.ndarray, out: Optional[np.ndarray] = None, block: int = 1 << 16) -> np.ndarray:
+    """
+    float32 in [-1, 1] -> int16, written into `out` through one reused
+    block-sized scratch buffer, so no full-length float temporary is made.
+    """
+    n = len(audio)
+    if out is None:
+        out = np.empty(n, dtype=np.int16)
+    scratch = np.empty(min(block, n), dtype=np.float32)
+    for i in range(0, n, block):
+        tmp = scratch[:min(block, n - i)]
+        np.multiply(audio[i:i + len(tmp)], 32767.0, out=tmp)
+        np.clip(tmp, -32767.0, 32767.0, out=tmp)
+        np.rint(tmp, out=tmp)
+        out[i:i + len(tmp)] = tmp
+    return out
+
 def _wav_bytes_from_float32(audio: np.ndarray, sr: int) -> bytes:
-    audio = np.clip(audio, -1.0, 1.0)
+    """16-bit mono WAV; samples are converted straight into the returned buffer."""
+    n = len(audio)
+    buf = bytearray(44 + 2 * n)
+    struct.pack_into("<4sI4s4sIHHIIHH4sI", buf, 0, b"RIFF", 36 + 2 * n, b"WAVE", b"fmt ", 16,
+                     1, 1, sr, 2 * sr, 2, 16, b"data", 2 * n)
+    _pcm16(audio, np.frombuffer(buf, dtype="<i2", count=n, offset=44))
+    return buf
+
+def _resample(audio: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
+    """
+    Mono float32 resampling, vectorized: integer downsampling ratios (24k ->
+    12k, 8k) average each group of samples; other ratios interpolate linearly.
+    """
+    if target_sr == sr:
+        return audio
+    if sr % target_sr == 0:
+        factor = sr // target_sr
+        n = len(audio) // factor
+        return audio[:n * factor].reshape(n, factor).mean(axis=1, dtype=np.float32)
+    pos = np.arange(int(len(audio) * target_sr / sr), dtype=np.float64) * (sr / target_sr)
+    return np.interp(pos, np.arange(len(audio)), audio).astype(np.float32)
+
+def _encode_audio(audio: np.ndarray, sr: int, fmt: str = "wav", target_sr: Optional[int] = None) -> bytes:
+    """Mono float32 (or int16) audio at `sr` -> `fmt` bytes at target_sr (default: sr)."""
+    target_sr = target_sr or sr
+    if target_sr != sr:
+        if audio.dtype == np.int16:
+            audio = audio * np.float32(1 / 32768)
+        audio = _resample(audio, sr, target_sr)
+    if fmt == "wav" and audio.dtype != np.int16:
+        return _wav_bytes_from_float32(audio, target_sr)
+    sf_format, subtype, _ = AUDIO_FORMATS[fmt]
     bio = io.BytesIO()
-    sf.write(bio, audio, sr, subtype="PCM_16", format="WAV")
+    sf.write(bio, audio if audio.dtype == np.int16 else _pcm16(audio), target_sr,
+             format=sf_format, subtype=subtype)
     return bio.getvalue()
 
+def _transcode_wav(wav: bytes, fmt: str, target_sr: Optional[int] = None) -> bytes:
+    """Re-encode a 16-bit mono WAV (cache entry, fresh synthesis); returned as is if it already matches."""
+    audio, sr = _wav_view(wav)
+    if fmt == "wav" and target_sr in (None, sr):
+        return wav
+    return _encode_audio(audio[:, 0], sr, fmt, target_sr)
+
+def _audio_fields(data: bytes, fmt: str) -> dict:
+    """Base64 payload keys: audio_b64_wav for WAV (as before), audio_b64 + format otherwise."""
+    b64 = base64.b64encode(data).decode("ascii")
+    return {"audio_b64_wav": b64} if fmt == "wav" else {"audio_b64": b64, "format": fmt}
+
+# (format tag, bits per sample) -> numpy dtype for WAVs we can view without decoding
+_WAV_DTYPES = {(1, 16): "<i2", (1, 32): "<i4", (3, 32): "<f4", (3, 64): "<f8"}
+
+def _wav_layout(f) -> Optional[Tuple[int, int, int, int, str]]:
+    """(data_offset, data_bytes, channels, sample_rate, dtype) of a plain PCM/float WAV, else None."""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        return None
+    fmt = None
+    while True:
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            return None
+        cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+        if cid == b"fmt ":
+            body = f.read(size + (size & 1))
+            if len(body) < 16:
+                return None
+            tag, channels, sr = struct.unpack_from("<HHI", body)
+            bits = struct.unpack_from("<H", body, 14)[0]
+            if tag == 0xFFFE and len(body) >= 26:  # WAVE_FORMAT_EXTENSIBLE: real tag in SubFormat
+                tag = struct.unpack_from("<H", body, 24)[0]
+            fmt = (channels, sr, _WAV_DTYPES.get((tag, bits)))
+        elif cid == b"data":
+            if fmt is None or fmt[2] is None or fmt[0] < 1:
+                return None
+            return (f.tell(), size) + fmt
+        else:
+            f.seek(size + (size & 1), io.SEEK_CUR)
+
+def _wav_view(src: Union[str, bytes]) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Samples of a PCM/float WAV without decoding or copying: np.memmap for a
+    path, np.frombuffer for bytes. Returns (frames x channels array, sr) or None.
+    """
+    f = open(src, "rb") if isinstance(src, str) else io.BytesIO(src)
+    with f:
+        layout = _wav_layout(f)
+        total = f.seek(0, io.SEEK_END)
+    if layout is None:
+        return None
+    offset, size, channels, sr, dtype = layout
+    size = min(size, total - offset)  # streamed WAVs may carry a bogus data size
+    frames = size // (np.dtype(dtype).itemsize * channels)
+    if frames == 0:
+        return None
+    if isinstance(src, str):
+        audio = np.memmap(src, dtype=dtype, mode="r", offset=offset, shape=(frames, channels))
+    else:
+        audio = np.frombuffer(src, dtype=dtype, count=frames * channels, offset=offset).reshape(frames, channels)
+    return audio, sr
+
 def _load_audio_from_input(inp: TranscribeInput) -> Tuple[np.ndarray, int]:
-    if not inp.audio_b64 and not inp.audio_path:
-        raise ValueError("Provide audio_b64 or audio_path")
+    """
+    Raw samples as (frames,) or (frames, channels), possibly integer PCM and
+    memory-mapped; _to_whisper_input() does the mono/float/resample pass.
+    """
+    if not inp.audio_b64 and not inp.audio_path and not inp.audio_uri:
+        raise ValueError("Provide audio_b64, audio_path or audio_uri")
     if inp.audio_b64:
-        data = base64.b64decode(inp.audio_b64)
-        bio = io.BytesIO(data)
-        audio, sr = sf.read(bio, dtype="float32")
+        src = base64.b64decode(inp.audio_b64)
     else:
-        audio, sr = sf.read(inp.audio_path, dtype="float32")
-    if audio.ndim == 2:
-        audio = audio.mean(axis=1)
-    return audio, sr
+        src = inp.audio_path or _path_from_audio_uri(inp.audio_uri)
+    view = _wav_view(src)
+    if view is not None:
+        return view
+    # compressed or exotic formats: let libsndfile decode
+    return sf.read(io.BytesIO(src) if isinstance(src, bytes) else src, dtype="float32")
 
-# ---------- STT (faster-whisper) ----------
-def _stt_with_faster_whisper(audio: np.ndarray, sr: int, language: Optional[str]) -> TranscribeOutput:
+def _mono_float32(block: np.ndarray) -> np.ndarray:
+    if block.dtype.kind == "i":
+        scale = np.float32(1.0 / (np.iinfo(block.dtype).max + 1))
+        block = block.astype(np.float32) * scale
+    else:
+        block = block.astype(np.float32, copy=False)
+    if block.ndim == 2:
+        block = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+    return block
+
+class _WhisperResampler:
+    """
+    Streaming conversion of blocks at `sr` to 16 kHz mono float32, through
+    PyAV's swresample (what faster-whisper's own decode_audio uses). It
+    low-pass filters before decimating, so content above 8 kHz (cymbals,
+    sibilance, 44.1/48 kHz noise) doesn't fold back into the speech band, and
+    it keeps its filter state from one block to the next.
+    """
+
+    def __init__(self, sr: int):
+        self.sr = sr
+        self._resampler = None
+        if sr != WHISPER_SAMPLE_RATE:
+            import av  # installed with faster-whisper
+            self._resampler = av.AudioResampler(format="flt", layout="mono", rate=WHISPER_SAMPLE_RATE)
+
+    def feed(self, block: np.ndarray) -> np.ndarray:
+        samples = _mono_float32(block)
+        if self._resampler is None:
+            return samples
+        import av
+        frame = av.AudioFrame.from_ndarray(np.ascontiguousarray(samples)[None, :], format="flt", layout="mono")
+        frame.sample_rate = self.sr
+        return self._collect(self._resampler.resample(frame))
+
+    def flush(self) -> np.ndarray:
+        """The samples still held in the filter, once the input has ended."""
+        if self._resampler is None:
+            return np.zeros(0, dtype=np.float32)
+        return self._collect(self._resampler.resample(None))
+
+    @staticmethod
+    def _collect(frames) -> np.ndarray:
+        if not frames:
+            return np.zeros(0, dtype=np.float32)
+        parts = [f.to_ndarray().reshape(-1) for f in frames]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+def _to_whisper_input(audio: np.ndarray, sr: int, block_sec: int = 30) -> np.ndarray:
+    """
+    Mono float32 at 16 kHz. Works block by block so a memory-mapped source is
+    never materialized at its original rate; other rates go through an
+    anti-aliased resampler (_WhisperResampler).
+    """
+    resampler = _WhisperResampler(sr)
+    step = sr * block_sec
+    parts = [resampler.feed(audio[start:start + step]) for start in range(0, audio.shape[0], step)]
+    parts.append(resampler.flush())
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+# ---------- TTS cache ----------
+@lru_cache(maxsize=1)
+def _kokoro_version() -> str:
+    if SPEECH_BACKEND == "stub":
+        return "stub"  # keep stub audio out of real cache entries
+    try:
+        from importlib.metadata import version
+        return version("kokoro")
+    except Exception:
+        return "unknown"
+
+def _voice_and_speed(voice: Optional[str], rate: Optional[float]) -> Tuple[str, float]:
+    return voice or KOKORO_DEFAULT_VOICE, rate if (rate and rate > 0) else 1.0
+
+KOKORO_LANGUAGES = {
+    "a": "American English", "b": "British English", "e": "Spanish", "f": "French",
+    "h": "Hindi", "i": "Italian", "j": "Japanese", "p": "Brazilian Portuguese", "z": "Mandarin Chinese",
+}
+# Kokoro-82M v1.0 voices, used when the repo listing can't be fetched (offline, stub)
+KOKORO_VOICES = (
+    "af_alloy", "af_aoede", "af_bella", "af_heart", "af_jessica", "af_kore", "af_nicole", "af_nova",
+    "af_river", "af_sarah", "af_sky", "am_adam", "am_echo", "am_eric", "am_fenrir", "am_liam",
+    "am_michael", "am_onyx", "am_puck", "am_santa", "bf_alice", "bf_emma", "bf_isabella", "bf_lily",
+    "bm_daniel", "bm_fable", "bm_george", "bm_lewis", "ef_dora", "em_alex", "em_santa", "ff_siwis",
+    "hf_alpha", "hf_beta", "hm_omega", "hm_psi", "if_sara", "im_nicola", "jf_alpha", "jf_gongitsune",
+    "jf_nezumi", "jf_tebukuro", "jm_kumo", "pf_dora", "pm_alex", "pm_santa", "zf_xiaobei", "zf_xiaoni",
+    "zf_xiaoxiao", "zf_xiaoyi", "zm_yunjian", "zm_yunxi", "zm_yunxia", "zm_yunyang",
+)
+
+@lru_cache(maxsize=1)
+def _voice_catalog() -> Tuple[str, ...]:
+    """Voice names in the Kokoro repo (voices/*.pt), or KOKORO_VOICES if it can't be listed."""
+    if SPEECH_BACKEND == "stub":
+        return KOKORO_VOICES
+    try:
+        from huggingface_hub import list_repo_files
+        names = sorted(f[len("voices/"):-len(".pt")] for f in list_repo_files(KOKORO_REPO_ID)
+                       if f.startswith("voices/") and f.endswith(".pt"))
+    except Exception as e:  # offline or HF_HUB_OFFLINE=1
+        print(f"[speech] listing {KOKORO_REPO_ID} voices failed ({type(e).__name__}); using built-in list",
+              file=sys.stderr)
+        return KOKORO_VOICES
+    return tuple(names) or KOKORO_VOICES
+
+def _lang_for(voice: Optional[str], lang_code: Optional[str] = None) -> str:
+    """
+    Kokoro language for a request: `lang_code` if given, else the first letter
+    of the voice name (Kokoro's convention: af_heart -> a, bf_emma -> b),
+    else KOKORO_LANG_CODE.
+    """
+    if lang_code:
+        lang_code = lang_code.lower()
+        if lang_code not in KOKORO_LANGUAGES:
+            raise ValueError(f"lang_code must be one of {sorted(KOKORO_LANGUAGES)}")
+        return lang_code
+    v = voice or KOKORO_DEFAULT_VOICE
+    if not v.endswith(".pt") and v[:1].lower() in KOKORO_LANGUAGES:
+        return v[:1].lower()
+    return KOKORO_LANG_CODE
+
+class _VoiceCache:
+    """
+    Kokoro voice tensors (style packs, ~0.5 MB each) in memory, shared by every
+    pipeline and language, least recently used evicted beyond max_bytes.
+    Blends like "af_heart,am_adam" are the mean of their parts, as in Kokoro.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self.load_sec = 0.0
+        self._voices: "OrderedDict[str, object]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()       # guards the index
+        self._load_lock = threading.RLock()  # one load at a time (blends nest); lookups don't wait on it
+
+    @staticmethod
+    def _nbytes(pack) -> int:
+        return int(pack.nbytes)
+
+    def _lookup(self, name: str):
+        with self._lock:
+            pack = self._voices.get(name)
+            if pack is not None:
+                self._voices.move_to_end(name)
+                self.hits += 1
+            return pack
+
+    def get(self, name: str):
+        pack = self._lookup(name)
+        if pack is not None:
+            return pack
+        with self._load_lock:
+            pack = self._lookup(name)  # loaded while we waited
+            if pack is not None:
+                return pack
+            t0 = time.perf_counter()
+            if "," in name:  # the parts' loads are counted on their own
+                pack = _mean_voice([self.get(n.strip()) for n in name.split(",") if n.strip()])
+                t0 = time.perf_counter()
+            else:
+                pack = _load_voice(name)
+            with self._lock:
+                self.misses += 1
+                self.load_sec += time.perf_counter() - t0
+                self._voices[name] = pack
+                self._bytes += self._nbytes(pack)
+                self._evict(keep=name)
+            return pack
+
+    def _evict(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._voices) > 1:
+            name = next(iter(self._voices))
+            if name == keep:
+                break
+            self._bytes -= self._nbytes(self._voices.pop(name))
+            self.evictions += 1
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._voices)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "voices": list(self._voices),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_sec": self.load_sec,
+            }
+
+def _load_voice(name: str):
+    """One voice pack: a repo voice name, or a path to a local .pt file."""
+    if SPEECH_BACKEND == "stub":
+        time.sleep(STUB_LOAD_SEC / 10)
+        return np.zeros((510, 1, 256), dtype=np.float32)  # Kokoro's pack shape
+    import torch
+    path = name
+    if not name.endswith(".pt"):
+        from huggingface_hub import hf_hub_download
+        with _quiet_stdout_to_stderr():
+            path = hf_hub_download(repo_id=KOKORO_REPO_ID, filename=f"voices/{name}.pt")
+    return torch.load(path, weights_only=True)
+
+def _mean_voice(parts: list):
+    if SPEECH_BACKEND == "stub":
+        return np.mean(np.stack(parts), axis=0)
+    import torch
+    return torch.mean(torch.stack(parts), dim=0)
+
+_voices = _VoiceCache(KOKORO_VOICE_CACHE_BYTES)
+
+class _TTSCache:
+    """
+    Content-addressed WAV files on disk with an in-memory LRU index.
+    Survives restarts: the index is rebuilt from the directory (oldest mtime
+    first) on first use, and hits touch the file's mtime.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size in bytes
+        self._bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, voice: Optional[str], rate: Optional[float], lang_code: Optional[str] = None) -> str:
+        v, speed = _voice_and_speed(voice, rate)
+        ident = [text, v, speed, _lang_for(voice, lang_code), _kokoro_version(), KOKORO_SAMPLE_RATE]
+        return hashlib.sha256(json.dumps(ident).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".wav")
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        entries = [e for e in os.scandir(self.root) if e.is_file() and e.name.endswith(".wav")]
+        for e in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = e.stat().st_size
+            self._index[e.name[:-4]] = size
+            self._bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._path(key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            self._load()
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except FileNotFoundError:  # removed behind our back
+                self._bytes -= self._index.pop(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return data
+
+    def put(self, key: str, wav: bytes) -> None:
+        if len(wav) > self.max_bytes:
+            return
+        with self._lock:
+            self._load()
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(wav)
+            os.replace(tmp, self._path(key))
+            self._bytes += len(wav) - self._index.pop(key, 0)
+            self._index[key] = len(wav)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._load()
+            for key in list(self._index):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(key))
+            self._index.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "dir": os.path.abspath(self.root),
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+_tts_cache = _TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES) if TTS_CACHE_ENABLED else None
+
+class _SentenceMemo:
+    """
+    In-memory LRU of per-sentence results, bounded by entry count and bytes.
+    The TTS cache above only helps when a whole text repeats; this catches the
+    greetings and persona boilerplate repeated inside otherwise new text.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._items: "OrderedDict[tuple, Tuple[object, int]]" = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: tuple, value, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, n) = self._items.popitem(last=False)
+                self._bytes -= n
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+# (lang_code, sentence) -> Kokoro phoneme strings; skips G2P. Phonemes are short, the count bounds it.
+_g2p_memo = _SentenceMemo(KOKORO_G2P_CACHE_SIZE, 64 * 1024 * 1024)
+# (lang_code, voice, speed, sentence) -> float32 audio; skips G2P and synthesis. The size bounds it.
+_segment_memo = _SentenceMemo(100_000, KOKORO_SEGMENT_CACHE_BYTES)
+
+def _sentence_memo_on() -> bool:
+    return _g2p_memo.enabled or _segment_memo.enabled
+
+def _sentence_memo_stats() -> dict:
+    return {"g2p": _g2p_memo.stats(), "segments": _segment_memo.stats()}
+
+# ---------- Stub backend (SPEECH_BACKEND=stub) ----------
+class _StubKPipeline:
+    """
+    KPipeline stand-in: yields a quiet 220 Hz tone per text chunk, about as long
+    as speaking it would take (~14 chars/s), after STUB_TTS_RTF x that long.
+    """
+
+    def __init__(self, lang_code: str = KOKORO_LANG_CODE, model=None):
+        self.lang_code = lang_code
+        if model is None:  # only loading the model is slow; extra pipelines share it
+            time.sleep(STUB_LOAD_SEC)
+        self.model = model or object()
+
+    def __call__(self, text: str, voice: Optional[str] = None, speed: float = 1.0,
+                 split_pattern: Optional[str] = r"\n+"):
+        chunks = re.split(split_pattern, text) if split_pattern else [text]
+        for chunk in chunks:
+            if not chunk or not chunk.strip():
+                continue
+            duration = max(0.2, len(chunk) / 14.0 / (speed or 1.0))
+            time.sleep(duration * STUB_TTS_RTF / 2)  # "G2P"; the text doubles as its phonemes
+            yield chunk, chunk, self._tone(duration)
+
+    def generate_from_tokens(self, tokens: str, voice: Optional[str] = None, speed: float = 1.0):
+        yield "", tokens, self._tone(max(0.2, len(tokens) / 14.0 / (speed or 1.0)))
+
+    @staticmethod
+    def _tone(duration: float) -> np.ndarray:
+        time.sleep(duration * STUB_TTS_RTF)
+        t = np.arange(int(duration * KOKORO_SAMPLE_RATE), dtype=np.float32) / KOKORO_SAMPLE_RATE
+        return (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+class _StubWhisper:
+    """WhisperModel stand-in: placeholder words (~2.5/s of audio) after STUB_STT_RTF x the duration."""
+
+    def __init__(self):
+        time.sleep(STUB_LOAD_SEC)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **kwargs):
+        from types import SimpleNamespace
+        duration = len(audio) / WHISPER_SAMPLE_RATE
+        time.sleep(duration * STUB_STT_RTF)
+        segment = SimpleNamespace(start=0.0, end=duration, text=" ".join(["stub"] * max(1, int(duration * 2.5))))
+        return iter([segment]), SimpleNamespace(language=language or "en", duration=duration)
+
+# ---------- Model loading / warm-up ----------
+@dataclass
+class _ModelState:
+    status: str = "not_loaded"  # not_loaded | loading | ready | error
+    load_sec: Optional[float] = None
+    warmup_sec: Optional[float] = None
+    error: Optional[str] = None
+
+_STARTED_AT = time.time()
+_model_state = {"tts": _ModelState(), "stt": _ModelState()}
+_model_locks = {"tts": threading.Lock(), "stt": threading.Lock()}
+
+def _timed_load(name: str, factory):
+    state = _model_state[name]
+    state.status, t0 = "loading", time.perf_counter()
+    try:
+        model = factory()
+    except Exception as e:
+        state.status, state.error = "error", f"{type(e).__name__}: {e}"
+        raise
+    state.status, state.error = "ready", None
+    state.load_sec = time.perf_counter() - t0
+    return model
+
+def _new_kokoro(lang_code: str = KOKORO_LANG_CODE, model=None):
+    """A KPipeline for `lang_code`; pass `model` to reuse an already loaded KModel."""
+    if SPEECH_BACKEND == "stub":
+        return _StubKPipeline(lang_code, model)
+    with _quiet_stdout_to_stderr():
+        from kokoro import KPipeline  # import quietly
+        return KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=True if model is None else model)
+
+def _new_faster():
+    if SPEECH_BACKEND == "stub":
+        return _StubWhisper()
+    from faster_whisper import WhisperModel
+    return WhisperModel(FASTER_WHISPER_MODEL, device=FASTER_WHISPER_DEVICE,
+                        compute_type=FASTER_WHISPER_COMPUTE_TYPE, cpu_threads=FASTER_WHISPER_THREADS,
+                        num_workers=max(1, FASTER_WHISPER_WORKERS))
+
+_kokoro_turn = itertools.count()
+
+def _kokoro_pipelines(lang_code: str = KOKORO_LANG_CODE) -> list:
+    """
+    KOKORO_PIPELINES_PER_LANG pipelines for `lang_code`, built once. The first
+    pipeline of the first language loads the model (timed as the tts load);
+    every later pipeline reuses that KModel and only adds its G2P.
+    Concurrent callers (e.g. the preload thread) wait on the lock.
+    """
+    pipes = _kokoro.get(lang_code)
+    if pipes is None:
+        with _model_locks["tts"]:
+            pipes = _kokoro.get(lang_code)
+            if pipes is None:
+                shared = next(iter(_kokoro.values()), None)
+                if shared is None:
+                    pipes = [_timed_load("tts", lambda: _new_kokoro(lang_code))]
+                else:
+                    pipes = [_new_kokoro(lang_code, shared[0].model)]
+                pipes += [_new_kokoro(lang_code, pipes[0].model)
+                          for _ in range(KOKORO_PIPELINES_PER_LANG - 1)]
+                _kokoro[lang_code] = pipes
+    return pipes
+
+def _get_kokoro(lang_code: str = KOKORO_LANG_CODE):
+    """The next pipeline for `lang_code`, round-robin."""
+    pipes = _kokoro_pipelines(lang_code)
+    return pipes[next(_kokoro_turn) % len(pipes)]
+
+def _new_kokoro_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: the parent has live threads (event loop workers, preload)
+    pool = ProcessPoolExecutor(max_workers=KOKORO_WORKERS, mp_context=mp.get_context("spawn"),
+                               initializer=_kokoro_worker_init,
+                               initargs=(KOKORO_LANG_CODE, max(1, (os.cpu_count() or 1) // KOKORO_WORKERS),
+                                         SPEECH_BACKEND, tuple(_preload_voice_names())))
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def _get_kokoro_pool() -> ProcessPoolExecutor:
+    global _kokoro_pool
+    if _kokoro_pool is None:
+        with _model_locks["tts"]:
+            if _kokoro_pool is None:
+                _kokoro_pool = _timed_load("tts", _new_kokoro_pool)
+    return _kokoro_pool
+
+def _get_faster():
     global _faster
     if _faster is None:
-        from faster_whisper import WhisperModel
-        _faster = WhisperModel(os.getenv("FASTER_WHISPER_MODEL", "small"))
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as tmp:
-        sf.write(tmp.name, audio, sr)
-        segments, info = _faster.transcribe(tmp.name, language=language)
-        text = " ".join(seg.text.strip() for seg in segments if seg.text)
-        return TranscribeOutput(text=text.strip(), language=info.language, duration_sec=info.duration)
+        with _model_locks["stt"]:
+            if _faster is None:
+                _faster = _timed_load("stt", _new_faster)
+    return _faster
+
+def _warm(name: str) -> None:
+    """Load `name` and run one tiny request through it so first-call costs are paid up front."""
+    if name == "tts" and KOKORO_WORKERS > 0:
+        pool = _get_kokoro_pool()
+        t0 = time.perf_counter()
+        # one job per worker: busy workers make the pool spawn (and load) all of them
+        v, speed = _voice_and_speed(None, None)
+        list(pool.map(_kokoro_worker_synth, ["Hello."] * KOKORO_WORKERS,
+                      [v] * KOKORO_WORKERS, [speed] * KOKORO_WORKERS))
+    elif name == "tts":
+        _kokoro_pipelines(KOKORO_LANG_CODE)  # the model itself; a failure here fails the preload
+        failed = []
+        # an extra language (e.g. j/z without misaki's extras) or a bad voice name
+        # shouldn't stop the warm-up; health shows what failed under models.tts.error
+        for lang_code in _preload_langs()[1:]:
+            try:
+                _kokoro_pipelines(lang_code)
+            except Exception as e:
+                failed.append(f"lang {lang_code}: {type(e).__name__}: {e}")
+        for voice in _preload_voice_names():
+            try:
+                _voices.get(voice)
+            except Exception as e:
+                failed.append(f"voice {voice}: {type(e).__name__}: {e}")
+        for problem in failed:
+            print(f"[speech] preload {problem}", file=sys.stderr)
+        _model_state["tts"].error = "; ".join(failed) or None
+        t0 = time.perf_counter()
+        for _ in _iter_kokoro("Hello.", None, None):
+            pass
+    else:
+        model = _get_faster()
+        t0 = time.perf_counter()
+        segments, _ = model.transcribe(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32))
+        for _ in segments:
+            pass
+    _model_state[name].warmup_sec = time.perf_counter() - t0
+
+def _preload_voice_names() -> List[str]:
+    return [v.strip() for v in KOKORO_PRELOAD_VOICES.split(",") if v.strip()]
+
+def _preload_langs() -> List[str]:
+    """KOKORO_LANG_CODE first, then KOKORO_LANG_CODES and the preloaded voices' languages."""
+    langs = [KOKORO_LANG_CODE] + [_lang_for(None, c.strip()) for c in KOKORO_LANG_CODES.split(",") if c.strip()]
+    langs += [_lang_for(v) for v in _preload_voice_names()]
+    return list(dict.fromkeys(langs))
+
+def _preload_targets(spec: str) -> List[str]:
+    names = {n.strip().lower() for n in spec.split(",") if n.strip()}
+    if "all" in names:
+        return ["tts", "stt"]
+    unknown = names - {"tts", "stt"}
+    if unknown:
+        raise ValueError(f"unknown preload target(s): {sorted(unknown)}")
+    return sorted(names)
+
+def _preload(names: List[str]) -> None:
+    for name in names:
+        try:
+            _warm(name)
+        except Exception as e:  # recorded in _model_state; the server keeps serving
+            print(f"[speech] preload {name} failed: {e}", file=sys.stderr)
+
+def start_preload(spec: str) -> Optional[threading.Thread]:
+    names = _preload_targets(spec)
+    if not names:
+        return None
+    t = threading.Thread(target=_preload, args=(names,), name="speech-preload", daemon=True)
+    t.start()
+    return t
+
+# ---------- Metrics ----------
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RTF_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+def _peak_rss_bytes() -> Optional[int]:
+    """High-water mark of this process's resident memory (children excluded)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus style, with rough quantiles."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def summary(self) -> dict:
+        return {"count": self.count, "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99),
+                "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts))}
+
+class _Metrics:
+    """Per-tool request/stage latency, real-time factor and memory, for the `stats` tool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests: dict = {}
+            self.errors: dict = {}
+            self.latency: dict = {}   # tool -> _Histogram
+            self.stages: dict = {}    # (tool, stage) -> _Histogram
+            self.rtf: dict = {}       # tool -> _Histogram
+            self.audio_sec: dict = {}
+            self.since = time.time()
+
+    def record(self, tool: str, total: float, stages: dict, audio_sec: Optional[float], error: bool) -> None:
+        with self._lock:
+            self.requests[tool] = self.requests.get(tool, 0) + 1
+            if error:
+                self.errors[tool] = self.errors.get(tool, 0) + 1
+            self.latency.setdefault(tool, _Histogram(LATENCY_BUCKETS)).observe(total)
+            for stage, sec in stages.items():
+                self.stages.setdefault((tool, stage), _Histogram(LATENCY_BUCKETS)).observe(sec)
+            if audio_sec:
+                self.audio_sec[tool] = self.audio_sec.get(tool, 0.0) + audio_sec
+                self.rtf.setdefault(tool, _Histogram(RTF_BUCKETS)).observe(total / audio_sec)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            tools = {}
+            for tool, hist in self.latency.items():
+                tools[tool] = {
+                    "requests": self.requests.get(tool, 0),
+                    "errors": self.errors.get(tool, 0),
+                    "audio_sec": self.audio_sec.get(tool, 0.0),
+                    "latency_sec": hist.summary(),
+                    "rtf": self.rtf[tool].summary() if tool in self.rtf else None,
+                    "stages_sec": {stage: h.summary() for (t, stage), h in self.stages.items() if t == tool},
+                }
+            peak = _peak_rss_bytes()
+            return {"since": self.since, "tools": tools,
+                    "peak_rss_mb": peak / 2 ** 20 if peak is not None else None}
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def hist(name: str, help_text: str, series: List[Tuple[str, _Histogram]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, h in series:
+                cumulative = 0
+                for bound, n in zip([*map(str, h.buckets), "+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {h.sum}")
+                lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+        with self._lock:
+            lines.append("# HELP speech_requests_total Tool calls handled.")
+            lines.append("# TYPE speech_requests_total counter")
+            for tool, n in self.requests.items():
+                lines.append(f'speech_requests_total{{tool="{tool}"}} {n}')
+            lines.append("# HELP speech_errors_total Tool calls that raised.")
+            lines.append("# TYPE speech_errors_total counter")
+            for tool, n in self.errors.items():
+                lines.append(f'speech_errors_total{{tool="{tool}"}} {n}')
+            hist("speech_request_seconds", "End-to-end tool latency.",
+                 [(f'tool="{t}"', h) for t, h in self.latency.items()])
+            hist("speech_stage_seconds", "Latency of one stage of a tool call.",
+                 [(f'tool="{t}",stage="{st}"', h) for (t, st), h in self.stages.items()])
+            hist("speech_real_time_factor", "Processing time divided by audio duration.",
+                 [(f'tool="{t}"', h) for t, h in self.rtf.items()])
+        peak = _peak_rss_bytes()
+        if peak is not None:
+            lines.append("# HELP speech_peak_rss_bytes Peak resident memory of the server process.")
+            lines.append("# TYPE speech_peak_rss_bytes gauge")
+            lines.append(f"speech_peak_rss_bytes {peak}")
+        return "\n".join(lines) + "\n"
+
+_metrics = _Metrics()
+
+class _Span:
+    """
+    Stage timings of one tool call. `with span.stage("decode"): ...` adds to
+    that stage; finish() records the call in _metrics and returns the summary
+    (total, stages, RTF, peak RSS and how much this call raised it).
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.stages: dict = {}
+        self.audio_sec: Optional[float] = None
+        self.summary: Optional[dict] = None
+        self._t0 = time.perf_counter()
+        self._rss0 = _peak_rss_bytes()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def finish(self, error: bool = False) -> dict:
+        total = time.perf_counter() - self._t0
+        _metrics.record(self.tool, total, self.stages, self.audio_sec, error)
+        peak = _peak_rss_bytes()
+        return {
+            "total_sec": total,
+            "stages_sec": dict(self.stages),
+            "audio_sec": self.audio_sec,
+            "rtf": total / self.audio_sec if self.audio_sec else None,
+            "peak_rss_mb": peak / 2 ** 20 if peak is not None else None,
+            "peak_rss_growth_mb": (peak - self._rss0) / 2 ** 20 if peak is not None else None,
+        }
+
+@contextlib.contextmanager
+def _instrumented(tool: str):
+    """Time a tool call (failed ones too); the summary lands in span.summary."""
+    span = _Span(tool)
+    try:
+        yield span
+    except BaseException:
+        span.summary = span.finish(error=True)
+        raise
+    span.summary = span.finish()
+
+def _with_timings(result: dict, span: _Span) -> dict:
+    if SPEECH_TIMINGS:
+        result["timings"] = span.summary
+    return result
+
+# ---------- Inference pools ----------
+class ServerBusy(RuntimeError):
+    """A model's queue is full; the caller should back off and retry."""
+
+PRIORITIES = {"interactive": 0, "bulk": 1}  # lower runs first
+
+class _ModelPool:
+    """
+    Bounded thread pool for one model: at most `workers` calls run at once and
+    at most `max_queue` more wait; past that, calls fail fast with ServerBusy
+    instead of piling up. Tools await the pool, so the event loop keeps serving
+    other requests (list_voices, health, the other model) meanwhile. Waiting
+    calls start by priority, then in arrival order, so bulk jobs yield to
+    interactive calls between steps. A call whose caller gave up (timeout,
+    cancel) is dropped if it has not started; a running one finishes and its
+    result is discarded, and keeps its tool call's slot until then, so work
+    abandoned by a timeout still counts against the limit.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.requests = 0  # admitted tool calls whose call or pool jobs are not finished yet
+        self.running = 0
+        self.completed = self.rejected = self.dropped = 0
+        self._lock = threading.Lock()
+        self._admission: contextvars.ContextVar = contextvars.ContextVar(f"{name}_admission", default=None)
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"{name}-model-{i}", daemon=True).start()
+
+    @contextlib.contextmanager
+    def request(self):
+        """
+        Admit one tool call, or raise ServerBusy if the queue is full. The slot
+        is held until the call has returned and every pool job it started (see
+        run) has finished or been dropped.
+        """
+        with self._lock:
+            if self.requests >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise ServerBusy(f"{self.name} busy: {self.requests} calls running or queued; retry later")
+            self.requests += 1
+        admission = _Admission()
+        token = self._admission.set(admission)
+        try:
+            yield
+        finally:
+            self._admission.reset(token)
+            with self._lock:
+                admission.open = False
+                self._release(admission)
+
+    def admission(self) -> Optional["_Admission"]:
+        """The tool call admitted in the current context, if any."""
+        return self._admission.get()
+
+    async def run(self, fn, *args, priority: int = PRIORITIES["interactive"],
+                  admissions: Optional[List["_Admission"]] = None):
+        """
+        fn(*args) on a pool thread, once a worker is free. The job holds the
+        current request's slot (or those of `admissions`, for work shared by
+        several calls) until it finishes.
+        """
+        if admissions is None:
+            admissions = [self._admission.get()]
+        admissions = [a for a in admissions if a is not None]
+        with self._lock:
+            for a in admissions:
+                a.jobs += 1
+        future: Future = Future()
+        future.add_done_callback(lambda f: self._done(f, admissions))
+        self._queue.put((priority, next(self._seq), future, fn, args))
+        # cancelling the wrapper cancels `future` too, which drops it if still queued
+        return await asyncio.wrap_future(future)
+
+    def _work(self) -> None:
+        while True:
+            _, _, future, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled while queued
+            with self._lock:
+                self.running += 1
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+    def _done(self, future, admissions: List["_Admission"]) -> None:
+        with self._lock:
+            if future.cancelled():
+                self.dropped += 1
+            else:
+                self.completed += 1
+            for a in admissions:
+                a.jobs -= 1
+                self._release(a)
+
+    def _release(self, admission: "_Admission") -> None:
+        """Free the slot once the call has returned and its jobs are done (lock held)."""
+        if not admission.open and not admission.jobs and not admission.released:
+            admission.released = True
+            self.requests -= 1
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "max_queue": self.max_queue, "requests": self.requests,
+                "running": self.running, "queued": self._queue.qsize(), "completed": self.completed,
+                "rejected": self.rejected, "dropped": self.dropped}
+
+class _Admission:
+    """One admitted tool call: open while the call runs, plus its unfinished pool jobs."""
+    __slots__ = ("open", "jobs", "released")
+
+    def __init__(self):
+        self.open, self.jobs, self.released = True, 0, False
+
+_stt_pool = _ModelPool("stt", STT_MAX_CONCURRENCY, SPEECH_MAX_QUEUE)
+_tts_pool = _ModelPool("tts", TTS_MAX_CONCURRENCY, SPEECH_MAX_QUEUE)
+
+@contextlib.contextmanager
+def _deadline(tool: str, timeout_sec: Optional[float]):
+    """Cancel the block after timeout_sec (None: SPEECH_REQUEST_TIMEOUT_SEC; 0: no limit)."""
+    limit = SPEECH_REQUEST_TIMEOUT_SEC if timeout_sec is None else timeout_sec
+    if not limit or limit <= 0:
+        yield
+        return
+    try:
+        with anyio.fail_after(limit):
+            yield
+    except TimeoutError:
+        raise TimeoutError(f"{tool} timed out after {limit:g}s") from None
+
+# ---------- STT (faster-whisper) ----------
+def _stt_with_faster_whisper(samples: np.ndarray, language: Optional[str]) -> TranscribeOutput:
+    """Transcribe 16 kHz mono float32 samples (see _to_whisper_input)."""
+    model = _get_faster()
+    # faster-whisper takes the 16 kHz array directly; no temp WAV round trip
+    segments, info = model.transcribe(samples, language=language)
+    text = " ".join(seg.text.strip() for seg in segments if seg.text)
+    return TranscribeOutput(text=text.strip(), language=info.language, duration_sec=info.duration)
+
+# faster-whisper's defaults for falling back to a higher temperature
+_FALLBACK_COMPRESSION_RATIO = 2.4
+_FALLBACK_LOG_PROB = -1.0
+_NO_SPEECH_PROB = 0.6
+
+def _needs_fallback(seg) -> bool:
+    """A segment the single-clip path would have re-decoded at a higher temperature."""
+    log_prob = getattr(seg, "avg_logprob", 0.0)
+    if getattr(seg, "no_speech_prob", 0.0) > _NO_SPEECH_PROB and log_prob < _FALLBACK_LOG_PROB:
+        return False  # silence, which transcribe() also accepts as is
+    return getattr(seg, "compression_ratio", 0.0) > _FALLBACK_COMPRESSION_RATIO or log_prob < _FALLBACK_LOG_PROB
+
+def _stt_batch_with_faster_whisper(clips: List[np.ndarray], language: Optional[str]) -> List[TranscribeOutput]:
+    """
+    Transcribe several short (< 30 s) clips in one BatchedInferencePipeline call.
+    Each clip gets its own zero-padded 30 s window and clip_timestamps covers
+    whole windows, so faster-whisper never merges two clips into one chunk;
+    segments are mapped back to clips by their midpoint.
+
+    The batched pipeline detects one language for the whole batch, so clips
+    without a language are transcribed one by one. It also decodes at the
+    first temperature only: a clip with a segment that would have triggered
+    the temperature fallback is transcribed again on its own.
+    """
+    if len(clips) == 1 or language is None or SPEECH_BACKEND == "stub":
+        return [_stt_with_faster_whisper(clip, language) for clip in clips]
+    from faster_whisper import BatchedInferencePipeline
+    window = WHISPER_SAMPLE_RATE * WHISPER_WINDOW_SEC
+    audio = np.zeros(len(clips) * window, dtype=np.float32)
+    for i, clip in enumerate(clips):
+        audio[i * window:i * window + len(clip)] = clip
+    clip_timestamps = [{"start": float(i * WHISPER_WINDOW_SEC), "end": float((i + 1) * WHISPER_WINDOW_SEC)}
+                       for i in range(len(clips))]
+    pipeline = BatchedInferencePipeline(model=_get_faster())
+    segments, info = pipeline.transcribe(audio, language=language, clip_timestamps=clip_timestamps,
+                                         batch_size=len(clips))
+    texts: List[List[str]] = [[] for _ in clips]
+    redo = set()
+    for seg in segments:
+        i = min(len(clips) - 1, int((seg.start + seg.end) / 2 // WHISPER_WINDOW_SEC))
+        if seg.text:
+            texts[i].append(seg.text.strip())
+        if _needs_fallback(seg):
+            redo.add(i)
+    return [_stt_with_faster_whisper(clip, language) if i in redo else
+            TranscribeOutput(text=" ".join(t).strip(), language=info.language,
+                             duration_sec=len(clip) / WHISPER_SAMPLE_RATE)
+            for i, (t, clip) in enumerate(zip(texts, clips))]
+
+class _STTBatcher:
+    """
+    Micro-batches concurrent transcribe_audio calls that name a language (the
+    batched pipeline can't detect one per clip): the first request starts a
+    window of `window_sec`; everything that arrives before it closes (or until
+    `max_size` requests are queued) runs through the model together, grouped
+    by language, in a worker thread.
+    """
+
+    def __init__(self, max_size: int, window_sec: float):
+        self.max_size = max_size
+        self.window_sec = window_sec
+        self.batches = self.clips = 0
+        self._queue: List[Tuple[np.ndarray, Optional[str], asyncio.Future, Optional[_Admission]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, samples: np.ndarray, language: Optional[str]) -> TranscribeOutput:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._queue.append((samples, language, fut, _stt_pool.admission()))
+        if len(self._queue) >= self.max_size:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_sec, self._flush, loop)
+        return await fut
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        queued, self._queue = self._queue, []
+        by_lang: dict = {}
+        for job in queued:
+            by_lang.setdefault(job[1], []).append(job)
+        for language, jobs in by_lang.items():
+            for i in range(0, len(jobs), self.max_size):
+                task = loop.create_task(self._run(jobs[i:i + self.max_size], language))
+                self._tasks.add(task)  # keep a reference until done
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, jobs, language: Optional[str]) -> None:
+        self.batches += 1
+        self.clips += len(jobs)
+        try:
+            outs = await _stt_pool.run(_stt_batch_with_faster_whisper,
+                                       [samples for samples, _, _, _ in jobs], language,
+                                       admissions=[a for _, _, _, a in jobs])
+        except Exception as e:
+            for _, _, fut, _ in jobs:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, _, fut, _), out in zip(jobs, outs):
+            if not fut.done():  # caller may have been cancelled
+                fut.set_result(out)
+
+    def stats(self) -> dict:
+        return {"max_size": self.max_size, "window_ms": self.window_sec * 1000,
+                "batches": self.batches, "clips": self.clips,
+                "mean_batch": self.clips / self.batches if self.batches else 0.0}
+
+_stt_batcher = _STTBatcher(STT_BATCH_SIZE, STT_BATCH_WINDOW_SEC) if STT_BATCH_SIZE > 1 else None
+
+# ---------- Long audio (VAD chunking) ----------
+def _speech_frames(samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Energy VAD over 30 ms frames of 16 kHz mono audio: (frame energy in dBFS,
+    speech flags). A frame is speech when louder than VAD_THRESHOLD_DB and
+    6 dB above the noise floor (10th percentile of the frames seen).
+    """
+    frame = int(WHISPER_SAMPLE_RATE * VAD_FRAME_SEC)
+    n = len(samples) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool)
+    frames = samples[:n * frame].reshape(n, frame)
+    db = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-10)
+    threshold = max(VAD_THRESHOLD_DB, float(np.percentile(db, 10)) + 6.0)
+    return db, db > threshold
+
+class _VADChunker:
+    """
+    Cuts a stream of 16 kHz mono blocks into chunks of at most max_sec, at the
+    last pause of min_silence_sec or more after min_sec (else at the quietest
+    frame). Yields (start_sec, samples, has_speech); memory stays ~max_sec.
+    """
+
+    def __init__(self, max_sec: float, min_sec: float, min_silence_sec: float):
+        self.max_len = int(max_sec * WHISPER_SAMPLE_RATE)
+        self.min_len = int(min(min_sec, max_sec) * WHISPER_SAMPLE_RATE)
+        self.min_silence_frames = max(1, int(round(min_silence_sec / VAD_FRAME_SEC)))
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._start = 0  # absolute sample index of _buf[0]
+
+    def feed(self, samples: np.ndarray) -> Iterator[Tuple[float, np.ndarray, bool]]:
+        self._buf = np.concatenate([self._buf, samples]) if len(self._buf) else samples
+        while len(self._buf) >= self.max_len:
+            yield self._emit(self._cut_point())
+
+    def flush(self) -> Iterator[Tuple[float, np.ndarray, bool]]:
+        if len(self._buf):
+            yield self._emit(len(self._buf))
+
+    def _cut_point(self) -> int:
+        frame = int(WHISPER_SAMPLE_RATE * VAD_FRAME_SEC)
+        db, speech = _speech_frames(self._buf[:self.max_len])
+        first = self.min_len // frame
+        # silent runs as [start, end) frame ranges
+        edges = np.flatnonzero(np.diff(np.concatenate([[1], speech.astype(np.int8), [1]])))
+        runs = [(a, b) for a, b in zip(edges[::2], edges[1::2])
+                if b - a >= self.min_silence_frames and (a + b) // 2 >= first]
+        if runs:
+            a, b = runs[-1]
+            return int((a + b) // 2) * frame
+        if first < len(db):
+            return (first + int(np.argmin(db[first:]))) * frame or self.max_len
+        return self.max_len
+
+    def _emit(self, cut: int) -> Tuple[float, np.ndarray, bool]:
+        chunk, self._buf = self._buf[:cut], self._buf[cut:]
+        start = self._start / WHISPER_SAMPLE_RATE
+        self._start += cut
+        _, speech = _speech_frames(chunk)
+        return start, chunk, bool(speech.any())
+
+def _open_long_audio(inp: LongTranscribeInput):
+    if inp.audio_b64:
+        return io.BytesIO(base64.b64decode(inp.audio_b64))
+    if inp.audio_path or inp.audio_uri:
+        return inp.audio_path or _path_from_audio_uri(inp.audio_uri)
+    raise ValueError("Provide audio_b64, audio_path or audio_uri")
+
+def _iter_vad_chunks(src, max_sec: float, min_sec: float,
+                     min_silence_sec: float) -> Iterator[Tuple[float, np.ndarray, bool]]:
+    """Read `src` block by block (sf.blocks), resample to 16 kHz and yield VAD-cut chunks."""
+    sr = sf.info(src).samplerate
+    if hasattr(src, "seek"):
+        src.seek(0)
+    chunker = _VADChunker(max_sec, min_sec, min_silence_sec)
+    resampler = _WhisperResampler(sr)  # one filter across blocks: no seams at block edges
+    for block in sf.blocks(src, blocksize=sr * 5, dtype="float32", always_2d=True):
+        yield from chunker.feed(resampler.feed(block))
+    yield from chunker.feed(resampler.flush())
+    yield from chunker.flush()
+
+def _stt_segments(samples: np.ndarray, language: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    """Timestamped segments (seconds from the start of `samples`) and the detected language."""
+    segments, info = _get_faster().transcribe(samples, language=language)
+    out = [{"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()}
+           for seg in segments if seg.text and seg.text.strip()]
+    return out, info.language
+
+def _chunk_record(index: int, start: float, n_samples: int, segments: List[dict]) -> dict:
+    """One transcribed chunk, with segment times shifted from the chunk to the whole file."""
+    for seg in segments:
+        seg["start"] = round(start + seg["start"], 3)
+        seg["end"] = round(start + seg["end"], 3)
+    return {"index": index, "start": round(start, 3), "end": round(start + n_samples / WHISPER_SAMPLE_RATE, 3),
+            "text": " ".join(seg["text"] for seg in segments), "segments": segments}
+
+def _long_result(chunks: List[dict], languages: dict, language: Optional[str], duration: float,
+                 return_segments: bool) -> dict:
+    result = {
+        "text": " ".join(c["text"] for c in chunks if c["text"]),
+        "language": language or (max(languages, key=languages.get) if languages else None),
+        "duration_sec": duration,
+        "chunks": len(chunks),
+    }
+    if return_segments:
+        result["segments"] = [seg for c in chunks for seg in c["segments"]]
+    return result
 
 # ---------- TTS (kokoro) ----------
-def _tts_with_kokoro(text: str, voice: Optional[str], rate: Optional[float]) -> SynthesizeOutput:
+def _iter_kokoro(text: str, voice: Optional[str], rate: Optional[float],
+                 split_pattern: str = r"\n+", lang_code: Optional[str] = None) -> Iterator[np.ndarray]:
     """
-    Uses kokoro.KPipeline(lang_code='a') and generates 24kHz audio.
+    Uses a kokoro.KPipeline for the request's language and yields 24kHz
+    float32 segments as the pipeline produces them. The voice pack comes
+    from the shared in-memory voice cache, not the pipeline's own loader.
+    With the sentence memos on, each split_pattern piece goes through
+    _synth_sentence (memoized per piece), yielding one segment per piece.
     Quiet stdout during import/init/call to keep MCP stdout clean.
     """
-    global _kokoro
+    lang = _lang_for(voice, lang_code)
+    pipeline = _get_kokoro(lang)
+    v, speed = _voice_and_speed(voice, rate)
+    pack = _voices.get(v)
+    if _sentence_memo_on():
+        for sentence in (re.split(split_pattern, text) if split_pattern else [text]):
+            sentence = _normalize_sentence(sentence or "")
+            audio = _synth_sentence(pipeline, sentence, v, pack, speed, lang) if sentence else None
+            if audio is not None and len(audio):
+                yield audio
+        return
+
     with _quiet_stdout_to_stderr():
-        from kokoro import KPipeline  # import quietly
-        if _kokoro is None:
-            _kokoro = KPipeline(lang_code=KOKORO_LANG_CODE)  # 'a' American English
+        results = pipeline(text, voice=pack, speed=speed, split_pattern=split_pattern)
+
+    while True:
+        with _quiet_stdout_to_stderr():
+            item = next(results, None)
+        if item is None:
+            return
+        _, _, audio = item
+        if audio is not None:
+            yield np.asarray(audio, dtype=np.float32)
+
+def _normalize_sentence(text: str) -> str:
+    """Memo key form of a sentence: NFKC, whitespace collapsed, trimmed (case is kept; G2P uses it)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
 
-        v = voice or KOKORO_DEFAULT_VOICE
-        speed = rate if (rate and rate > 0) else 1.0
+def _synth_sentence(pipeline, sentence: str, voice: str, pack, speed: float,
+                    lang_code: str) -> Optional[np.ndarray]:
+    """
+    Audio for one normalized sentence. A segment-memo hit skips Kokoro; a
+    phoneme-memo hit feeds the stored phonemes to generate_from_tokens and
+    skips G2P; a miss runs the full pipeline and records both.
+    """
+    seg_key = (lang_code, voice, speed, sentence)
+    if _segment_memo.enabled:
+        audio = _segment_memo.get(seg_key)
+        if audio is not None:
+            return audio
+    g2p_key = (lang_code, sentence)
+    phonemes = _g2p_memo.get(g2p_key) if _g2p_memo.enabled else None
+    with _quiet_stdout_to_stderr():
+        if phonemes is not None:
+            results = [r for ps in phonemes for r in pipeline.generate_from_tokens(ps, voice=pack, speed=speed)]
+        else:
+            results = list(pipeline(sentence, voice=pack, speed=speed, split_pattern=None))
+    if phonemes is None and _g2p_memo.enabled:
+        ps = tuple(p for _, p, _ in results if p)  # one string per <=510-phoneme chunk
+        if ps:
+            _g2p_memo.put(g2p_key, ps, sum(len(p) for p in ps))
+    chunks = [np.asarray(a, dtype=np.float32) for _, _, a in results if a is not None]
+    if not chunks:
+        return None
+    audio = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    if _segment_memo.enabled:
+        audio.setflags(write=False)  # shared by every later hit
+        _segment_memo.put(seg_key, audio, audio.nbytes)
+    return audio
 
-        chunks: List[np.ndarray] = []
-        for _, _, audio in _kokoro(text, voice=v, speed=speed, split_pattern=r"\n+"):
-            chunks.append(np.asarray(audio, dtype=np.float32))
+# ---- sentence-parallel synthesis on worker processes (KOKORO_WORKERS > 0) ----
+_worker_pipelines: dict = {}  # per worker process: lang_code -> KPipeline
 
+def _kokoro_worker_init(lang_code: str, torch_threads: int, backend: str = "real",
+                        voices: Tuple[str, ...] = ()) -> None:
+    global SPEECH_BACKEND
+    # fd 1 is the parent's MCP stdout; nothing a worker prints may reach it
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    SPEECH_BACKEND = backend  # spawned workers re-read the env, not the parent's --backend
+    if backend != "stub":
+        with contextlib.suppress(ImportError):
+            import torch
+            torch.set_num_threads(torch_threads)  # don't oversubscribe cores across workers
+    pipeline = _new_kokoro(lang_code)
+    _worker_pipelines[lang_code] = pipeline
+    for v in voices:  # Kokoro keeps loaded packs in pipeline.voices
+        if backend != "stub":
+            pipeline.load_voice(v)
+
+def _kokoro_worker_synth(text: str, voice: str, speed: float, lang_code: str = KOKORO_LANG_CODE) -> np.ndarray:
+    pipeline = _worker_pipelines.get(lang_code)
+    if pipeline is None:  # another language: new G2P on the worker's loaded model
+        shared = next(iter(_worker_pipelines.values()))
+        pipeline = _worker_pipelines[lang_code] = _new_kokoro(lang_code, shared.model)
+    if _sentence_memo_on():  # each worker process keeps its own memos
+        audio = _synth_sentence(pipeline, _normalize_sentence(text), voice, voice, speed, lang_code)
+        return np.zeros(0, dtype=np.float32) if audio is None else audio
+    chunks = [np.asarray(audio, dtype=np.float32)
+              for _, _, audio in pipeline(text, voice=voice, speed=speed, split_pattern=None)
+              if audio is not None]
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+def _iter_kokoro_parallel(text: str, voice: Optional[str], rate: Optional[float],
+                          lang_code: Optional[str] = None) -> Iterator[np.ndarray]:
+    """
+    Split `text` into sentences (KOKORO_STREAM_SPLIT), synthesize them all at
+    once on the worker pool, and yield the audio in sentence order.
+    """
+    sentences = [t.strip() for t in re.split(KOKORO_STREAM_SPLIT, text) if t and t.strip()]
+    v, speed = _voice_and_speed(voice, rate)
+    lang = _lang_for(voice, lang_code)
+    pool = _get_kokoro_pool()
+    futures = [pool.submit(_kokoro_worker_synth, t, v, speed, lang) for t in sentences]
+    try:
+        for fut in futures:
+            audio = fut.result()
+            if len(audio):
+                yield audio
+    finally:
+        for fut in futures:  # consumer stopped early
+            fut.cancel()
+
+def _iter_tts(text: str, voice: Optional[str], rate: Optional[float],
+              split_pattern: str = r"\n+", lang_code: Optional[str] = None) -> Iterator[np.ndarray]:
+    if KOKORO_WORKERS > 0:
+        return _iter_kokoro_parallel(text, voice, rate, lang_code)
+    return _iter_kokoro(text, voice, rate, split_pattern=split_pattern, lang_code=lang_code)
+
+def _tts_loaded(voice: Optional[str], lang_code: Optional[str] = None) -> bool:
+    """Whether a request needs no model, pipeline or voice load before inference."""
+    if _model_state["tts"].status != "ready":
+        return False
+    if KOKORO_WORKERS > 0:
+        return True
+    v, _ = _voice_and_speed(voice, None)
+    return _lang_for(voice, lang_code) in _kokoro and v in _voices.loaded()
+
+def _load_tts_model(voice: Optional[str] = None, lang_code: Optional[str] = None) -> None:
+    if KOKORO_WORKERS > 0:
+        _get_kokoro_pool()
+    else:
+        _kokoro_pipelines(_lang_for(voice, lang_code))
+        _voices.get(_voice_and_speed(voice, None)[0])
+
+async def _tts_with_kokoro(text: str, voice: Optional[str], rate: Optional[float],
+                           span: Optional[_Span] = None, lang_code: Optional[str] = None) -> Tuple[bytes, bool]:
+    """WAV bytes for `text` (from the cache when possible) and whether it was a cache hit."""
+    span = span or _Span("tts")  # unrecorded unless the caller finishes it
+    with span.stage("cache_lookup"):
+        key = _tts_cache.key(text, voice, rate, lang_code) if _tts_cache else None
+        b = await anyio.to_thread.run_sync(_tts_cache.get, key) if key else None
+    if b is not None:
+        span.audio_sec = sf.info(io.BytesIO(b)).duration
+        return b, True
+
+    if not _tts_loaded(voice, lang_code):
+        with span.stage("model_load"):  # model, this language's pipelines and the voice
+            await anyio.to_thread.run_sync(_load_tts_model, voice, lang_code)
+    with span.stage("inference"):  # includes time queued for a Kokoro slot
+        # the memos work per piece, so with them on cut at sentences rather than lines
+        split = KOKORO_STREAM_SPLIT if _sentence_memo_on() else r"\n+"
+        chunks: List[np.ndarray] = await _tts_pool.run(
+            lambda: list(_iter_tts(text, voice, rate, split_pattern=split, lang_code=lang_code)))
     if not chunks:
         raise RuntimeError("Kokoro returned no audio")
 
-    audio = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
-    sr = 24000  # kokoro default sample rate
-    b = _wav_bytes_from_float32(audio, sr)
-    return SynthesizeOutput(audio_b64_wav=base64.b64encode(b).decode("ascii"), sample_rate=sr)
+    with span.stage("wav_encode"):
+        audio = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        b = await anyio.to_thread.run_sync(_wav_bytes_from_float32, audio, KOKORO_SAMPLE_RATE)
+    span.audio_sec = len(audio) / KOKORO_SAMPLE_RATE
+    if key:
+        with span.stage("cache_write"):
+            await anyio.to_thread.run_sync(_tts_cache.put, key, b)
+    return b, False
+
+# ---------- Background jobs ----------
+@dataclass
+class _Job:
+    id: str
+    kind: str        # tts | stt
+    priority: str    # interactive | bulk
+    payload: dict
+    status: str = "queued"  # queued | running | cancelling | done | error | cancelled
+    progress: float = 0.0   # 0..1
+    detail: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def public(self, with_result: bool = True) -> dict:
+        out = {k: v for k, v in self.__dict__.items() if k != "payload"}
+        if not with_result:
+            out.pop("result")
+        return out
+
+class _JobManager:
+    """
+    Long synthesis/transcription that outlives a tool call. submit() returns a
+    job id at once; at most `concurrency` jobs run, the rest wait by priority
+    then submission order. Job work goes through the model pools step by step
+    (a sentence, or a VAD chunk) at the job's priority, so interactive tool
+    calls slip in between steps of a bulk job. Finished jobs are written to
+    TTS_DOWNLOAD_DIR/jobs/<id>.json (TTS audio next to it as <id>.wav/.flac/.opus) and
+    stay pollable after a restart.
+    """
+
+    def __init__(self, concurrency: int, max_queued: int, history: int):
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max_queued
+        self.history = history
+        self._jobs: "OrderedDict[str, _Job]" = OrderedDict()
+        self._waiting: List[Tuple[int, int, str]] = []  # heap of (priority, seq, id)
+        self._seq = itertools.count()
+        self._running: dict = {}  # id -> asyncio.Task
+        self._done_events: dict = {}
+
+    def submit(self, kind: str, payload: dict, priority: str) -> _Job:
+        if kind not in ("tts", "stt"):
+            raise ValueError("kind must be 'tts' or 'stt'")
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {sorted(PRIORITIES)}")
+        # validate now so a bad payload fails the submit, not the job
+        if kind == "tts":
+            SynthesizeInput(**payload)
+        else:
+            _open_long_audio(LongTranscribeInput(**payload))
+        if len(self._waiting) >= self.max_queued:
+            raise ServerBusy(f"job queue full ({len(self._waiting)} waiting); retry later")
+        job = _Job(id=uuid.uuid4().hex, kind=kind, priority=priority, payload=payload, created=time.time())
+        self._jobs[job.id] = job
+        self._done_events[job.id] = asyncio.Event()
+        heapq.heappush(self._waiting, (PRIORITIES[priority], next(self._seq), job.id))
+        self._dispatch()
+        return job
+
+    async def get(self, job_id: str) -> Optional[_Job]:
+        job = self._jobs.get(job_id)
+        if job is None and re.fullmatch(r"[0-9a-f]{32}", job_id or ""):
+            # finished before a restart, or dropped from history
+            path = _safe_out_path(f"jobs/{job_id}.json", create=False)
+            record = await anyio.to_thread.run_sync(_read_job_record, path)
+            if record is not None:
+                job = _Job(payload={}, **record)
+        return job
+
+    def position(self, job_id: str) -> Optional[int]:
+        """0-based place in the waiting line, or None if not waiting."""
+        order = [i for _, _, i in sorted(self._waiting)]
+        return order.index(job_id) if job_id in order else None
+
+    async def wait(self, job_id: str, timeout: float) -> None:
+        event = self._done_events.get(job_id)
+        if event is not None and timeout > 0:
+            with anyio.move_on_after(timeout):
+                await event.wait()
+
+    async def cancel(self, job_id: str) -> Optional[_Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in ("queued", "running"):  # finished, or already cancelling
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            job.status = "cancelling"  # _run records "cancelled" once the current step returns
+            task.cancel()
+        else:
+            self._waiting = [w for w in self._waiting if w[2] != job_id]
+            heapq.heapify(self._waiting)
+            await self._finish(job, "cancelled")
+        return job
+
+    def list(self) -> List[dict]:
+        return [job.public(with_result=False) for job in self._jobs.values()]
+
+    def stats(self) -> dict:
+        counts: dict = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"concurrency": self.concurrency, "waiting": len(self._waiting),
+                "running": len(self._running), "by_status": counts}
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._waiting and len(self._running) < self.concurrency:
+            _, _, job_id = heapq.heappop(self._waiting)
+            job = self._jobs[job_id]
+            job.status, job.started = "running", time.time()
+            self._running[job_id] = loop.create_task(self._run(job))
+
+    async def _run(self, job: _Job) -> None:
+        try:
+            run = _run_tts_job if job.kind == "tts" else _run_stt_job
+            with _instrumented(f"job_{job.kind}") as span:
+                job.result = await run(job, span)
+            await self._finish(job, "done")
+        except asyncio.CancelledError:
+            await self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            await self._finish(job, "error")
+        finally:
+            self._running.pop(job.id, None)
+            self._dispatch()
+
+    async def _finish(self, job: _Job, status: str) -> None:
+        job.status, job.finished = status, time.time()
+        if status == "done":
+            job.progress = 1.0
+        job.payload = {}  # may hold base64 audio; not needed any more
+        try:
+            await anyio.to_thread.run_sync(_write_job_record, f"jobs/{job.id}.json", job.public())
+        except OSError as e:
+            print(f"[jobs] could not persist {job.id}: {e}", file=sys.stderr)
+        event = self._done_events.pop(job.id, None)
+        if event is not None:
+            event.set()
+        # keep the newest `history` finished jobs in memory; older ones are read back from disk
+        finished = [i for i, j in self._jobs.items() if j.finished is not None]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+def _write_job_record(name: str, record: dict) -> None:
+    with open(_safe_out_path(name), "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+def _read_job_record(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+async def _run_tts_job(job: _Job, span: _Span) -> dict:
+    inp = SynthesizeInput(**job.payload)
+    priority = PRIORITIES[job.priority]
+    target = _safe_out_path(inp.save_path or f"jobs/{job.id}.{AUDIO_FORMATS[inp.format][2]}")
+    sr = KOKORO_SAMPLE_RATE
+    with span.stage("cache_lookup"):
+        key = _tts_cache.key(inp.text, inp.voice, inp.rate, inp.lang_code) if _tts_cache else None
+        b = await anyio.to_thread.run_sync(_tts_cache.get, key) if key else None
+    cached, segments = b is not None, 1
+    if not cached:
+        if not _tts_loaded(inp.voice, inp.lang_code):
+            with span.stage("model_load"):
+                await anyio.to_thread.run_sync(_load_tts_model, inp.voice, inp.lang_code)
+        total = max(1, len([t for t in re.split(KOKORO_STREAM_SPLIT, inp.text) if t and t.strip()]))
+        pieces = _iter_tts(inp.text, inp.voice, inp.rate, split_pattern=KOKORO_STREAM_SPLIT,
+                           lang_code=inp.lang_code)
+        kept: List[np.ndarray] = []
+        while True:
+            with span.stage("inference"):
+                audio = await _tts_pool.run(next, pieces, None, priority=priority)
+            if audio is None:
+                break
+            kept.append(audio)
+            job.progress = min(0.99, len(kept) / total)
+            job.detail = {"segments_done": len(kept), "segments_total": total}
+        if not kept:
+            raise RuntimeError("Kokoro returned no audio")
+        segments = len(kept)
+        with span.stage("wav_encode"):
+            b = await anyio.to_thread.run_sync(_wav_bytes_from_float32, np.concatenate(kept), sr)
+        if key:
+            with span.stage("cache_write"):
+                await anyio.to_thread.run_sync(_tts_cache.put, key, b)
+    span.audio_sec = sf.info(io.BytesIO(b)).duration
+    if inp.format != "wav" or inp.sample_rate != sr:
+        with span.stage("encode"):
+            b = await anyio.to_thread.run_sync(_transcode_wav, b, inp.format, inp.sample_rate)
+    with span.stage("disk_write"):
+        await anyio.to_thread.run_sync(_write_file, target, b)
+    return {"segments": segments, "sample_rate": inp.sample_rate, "format": inp.format,
+            "duration_sec": span.audio_sec, "cached": cached, **_saved_file_fields(target)}
+
+async def _run_stt_job(job: _Job, span: _Span) -> dict:
+    inp = LongTranscribeInput(**job.payload)
+    priority = PRIORITIES[job.priority]
+    src = _open_long_audio(inp)
+    total = sf.info(src).duration
+    if hasattr(src, "seek"):
+        src.seek(0)
+    if _model_state["stt"].status != "ready":
+        with span.stage("model_load"):
+            await anyio.to_thread.run_sync(_get_faster)
+    chunks = _iter_vad_chunks(src, inp.max_chunk_sec, inp.min_chunk_sec, inp.min_silence_ms / 1000)
+    records: List[dict] = []
+    languages: dict = {}
+    duration = 0.0
+    while True:
+        with span.stage("read_vad"):
+            item = await anyio.to_thread.run_sync(next, chunks, None)
+        if item is None:
+            break
+        start, samples, has_speech = item
+        segments: List[dict] = []
+        if has_speech:
+            with span.stage("inference"):
+                segments, lang = await _stt_pool.run(_stt_segments, samples, inp.language, priority=priority)
+            languages[lang] = languages.get(lang, 0) + 1
+        records.append(_chunk_record(len(records), start, len(samples), segments))
+        duration = start + len(samples) / WHISPER_SAMPLE_RATE
+        job.progress = min(0.99, duration / total) if total else 0.0
+        job.detail = {"audio_sec_done": round(duration, 3), "audio_sec_total": round(total, 3)}
+    span.audio_sec = duration
+    return _long_result(records, languages, inp.language, duration, inp.return_segments)
+
+_jobs = _JobManager(SPEECH_JOB_CONCURRENCY, SPEECH_JOB_MAX_QUEUED, SPEECH_JOB_HISTORY)
 
 # ---------- Tools ----------
 @app.tool()
-def transcribe_audio(payload: dict) -> dict:
-    """Transcribe audio to text. payload: {audio_b64?, audio_path?, language?}"""
-    inp = TranscribeInput(**payload)
-    audio, sr = _load_audio_from_input(inp)
-    out = _stt_with_faster_whisper(audio, sr, inp.language)
-    return out.__dict__
+async def transcribe_audio(payload: dict) -> dict:
+    """Transcribe audio to text. payload: {audio_b64?, audio_path?, audio_uri?, language?, timeout_sec?}"""
+    with _instrumented("transcribe_audio") as span:
+        inp = TranscribeInput(**payload)
+        with _stt_pool.request(), _deadline("transcribe_audio", inp.timeout_sec):
+            with span.stage("decode"):
+                audio, sr = await anyio.to_thread.run_sync(_load_audio_from_input, inp)
+            with span.stage("resample"):
+                samples = await anyio.to_thread.run_sync(_to_whisper_input, audio, sr)
+            span.audio_sec = len(samples) / WHISPER_SAMPLE_RATE
+            if _model_state["stt"].status != "ready":
+                with span.stage("model_load"):
+                    await anyio.to_thread.run_sync(_get_faster)
+            # includes time queued for a model slot, and the batching window when batched
+            with span.stage("inference"):
+                if (_stt_batcher is not None and inp.language
+                        and len(samples) < WHISPER_SAMPLE_RATE * WHISPER_WINDOW_SEC):
+                    out = await _stt_batcher.submit(samples, inp.language)
+                else:
+                    out = await _stt_pool.run(_stt_with_faster_whisper, samples, inp.language)
+        result = out.__dict__
+    return _with_timings(result, span)
 
 @app.tool()
-def synthesize_speech(payload: dict) -> dict:
-    """Synthesize speech. payload: {text, voice?, rate?, save_path?}"""
-    inp = SynthesizeInput(**payload)
-    out = _tts_with_kokoro(inp.text, inp.voice, inp.rate)
-    out_dict = out.__dict__.copy()
-
-    if inp.save_path:
-        target = _safe_out_path(inp.save_path)
-        with open(target, "wb") as f:
-            f.write(base64.b64decode(out.audio_b64_wav))
-        out_dict["audio_path"] = target
-        if TTS_FILE_BASE_URL:
-            rel = os.path.relpath(target, start=os.path.abspath(TTS_DOWNLOAD_DIR)).replace(os.sep, "/")
-            out_dict["audio_url"] = TTS_FILE_BASE_URL.rstrip("/") + "/" + rel
-
-    return out_dict
+async def transcribe_long_audio(payload: dict, ctx: Context) -> dict:
+    """
+    Transcribe long recordings without loading them whole.
+    payload: {audio_path? | audio_uri? | audio_b64?, language?, max_chunk_sec?, min_chunk_sec?,
+              min_silence_ms?, workers?, return_segments?, timeout_sec?}
+    The file is read in blocks, cut into <= max_chunk_sec chunks at pauses
+    (energy VAD), and `workers` chunks are transcribed at once. Each chunk is
+    sent in order as a progress notification whose message is JSON
+    {index, start, end, text, segments: [{start, end, text}]} with times in
+    seconds from the start of the file. Silent chunks are skipped. There is no
+    timeout unless timeout_sec is given.
+    Result: {text, language, duration_sec, chunks, segments?}
+    """
+    with _instrumented("transcribe_long_audio") as span:
+        inp = LongTranscribeInput(**payload)
+        # admitted once; its chunks then share the model workers with everyone else
+        with _stt_pool.request(), _deadline("transcribe_long_audio", inp.timeout_sec or 0):
+            src = _open_long_audio(inp)
+            workers = max(1, inp.workers or STT_LONG_WORKERS)
+            chunks = _iter_vad_chunks(src, inp.max_chunk_sec, inp.min_chunk_sec, inp.min_silence_ms / 1000)
+            if _model_state["stt"].status != "ready":
+                with span.stage("model_load"):
+                    await anyio.to_thread.run_sync(_get_faster)
+
+            # bounded queue: the reader stays at most `workers` chunks ahead of the model
+            send, recv = anyio.create_memory_object_stream(workers)
+            done: dict = {}
+            emitted: List[dict] = []
+            languages: dict = {}
+            duration = [0.0]
+            emit_lock = anyio.Lock()
+
+            async def read() -> None:
+                async with send:
+                    index = 0
+                    while True:
+                        with span.stage("read_vad"):
+                            item = await anyio.to_thread.run_sync(next, chunks, None)
+                        if item is None:
+                            return
+                        start, samples, has_speech = item
+                        duration[0] = start + len(samples) / WHISPER_SAMPLE_RATE
+                        await send.send((index, start, samples, has_speech))
+                        index += 1
+
+            async def flush_in_order() -> None:
+                async with emit_lock:
+                    while len(emitted) in done:
+                        chunk = done.pop(len(emitted))
+                        emitted.append(chunk)
+                        if chunk["segments"] or chunk["text"]:
+                            with span.stage("notify"):
+                                await ctx.report_progress(len(emitted), None, message=json.dumps(chunk))
+
+            async def work(items) -> None:
+                async with items:
+                    async for index, start, samples, has_speech in items:
+                        segments: List[dict] = []
+                        if has_speech:
+                            with span.stage("inference"):
+                                segments, lang = await _stt_pool.run(_stt_segments, samples, inp.language)
+                            languages[lang] = languages.get(lang, 0) + 1
+                        done[index] = _chunk_record(index, start, len(samples), segments)
+                        await flush_in_order()
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(read)
+                with recv:  # each worker holds its own clone
+                    for _ in range(workers):
+                        tg.start_soon(work, recv.clone())
+
+            span.audio_sec = duration[0]
+            result = _long_result(emitted, languages, inp.language, duration[0], inp.return_segments)
+    return _with_timings(result, span)
 
 @app.tool()
-def list_voices(payload: dict) -> dict:
-    """Return a small set of known Kokoro voices."""
-    return {"backend": "kokoro", "voices": ["af_heart"], "lang_code": KOKORO_LANG_CODE}
+async def synthesize_speech(payload: dict) -> dict:
+    """
+    Synthesize speech. payload: {text, voice?, rate?, lang_code?, save_path?, return_audio?,
+                                 timeout_sec?, format?: "wav" | "flac" | "opus", sample_rate?}
+    WAV comes back as audio_b64_wav; FLAC and Ogg/Opus as audio_b64 (with `format`).
+    Without `format`, a save_path ending in .wav/.flac/.opus/.ogg picks it; a
+    save_path whose extension disagrees with `format` is rejected.
+    With return_audio=false the audio is only written to disk (save_path, or an
+    auto-named file under speech/) and referenced by audio_path/audio_uri.
+    """
+    with _instrumented("synthesize_speech") as span:
+        inp = SynthesizeInput(**payload)
+        with _tts_pool.request(), _deadline("synthesize_speech", inp.timeout_sec):
+            wav, cached = await _tts_with_kokoro(inp.text, inp.voice, inp.rate, span, inp.lang_code)
+        if inp.format != "wav" or inp.sample_rate != KOKORO_SAMPLE_RATE:
+            with span.stage("encode"):
+                wav = await anyio.to_thread.run_sync(_transcode_wav, wav, inp.format, inp.sample_rate)
+        out = SynthesizeOutput(sample_rate=inp.sample_rate, cached=cached, format=inp.format)
+        if inp.return_audio:
+            with span.stage("base64"):
+                for k, v in _audio_fields(wav, inp.format).items():
+                    setattr(out, k, v)
+
+        save_path = inp.save_path
+        if not save_path and not inp.return_audio:
+            ext = AUDIO_FORMATS[inp.format][2]
+            save_path = f"speech/{_TTSCache.key(inp.text, inp.voice, inp.rate, inp.lang_code)[:16]}_{inp.sample_rate}.{ext}"
+        if save_path:
+            with span.stage("disk_write"):
+                target = _safe_out_path(save_path)
+                await anyio.to_thread.run_sync(_write_file, target, wav)
+            for k, v in _saved_file_fields(target).items():
+                setattr(out, k, v)
+        result = out.__dict__
+    return _with_timings(result, span)
+
+async def _stream_segments(inp: SynthesizeInput, key: Optional[str], ctx: Context, span: _Span) -> dict:
+    sr = KOKORO_SAMPLE_RATE
+    if not _tts_loaded(inp.voice, inp.lang_code):
+        with span.stage("model_load"):
+            await anyio.to_thread.run_sync(_load_tts_model, inp.voice, inp.lang_code)
+    segments = _iter_tts(inp.text, inp.voice, inp.rate, split_pattern=KOKORO_STREAM_SPLIT,
+                         lang_code=inp.lang_code)
+    kept: List[np.ndarray] = []
+    index = n_samples = 0
+    while True:
+        # one pipeline step per Kokoro slot, so notifications flush between segments
+        # and concurrent streams take turns
+        with span.stage("inference"):
+            audio = await _tts_pool.run(next, segments, None)
+        if audio is None:
+            break
+        with span.stage("wav_encode" if inp.format == "wav" else "encode"):
+            b = await anyio.to_thread.run_sync(_encode_audio, audio, sr, inp.format, inp.sample_rate)
+        with span.stage("base64"):
+            message = json.dumps({"index": index, "sample_rate": inp.sample_rate,
+                                  **_audio_fields(b, inp.format)})
+        index += 1
+        n_samples += len(audio)
+        with span.stage("notify"):
+            await ctx.report_progress(index, None, message=message)
+        if inp.save_path or key:
+            kept.append(audio)
+
+    if index == 0:
+        raise RuntimeError("Kokoro returned no audio")
+
+    span.audio_sec = n_samples / sr
+    out = {"segments": index, "sample_rate": inp.sample_rate, "format": inp.format,
+           "duration_sec": span.audio_sec, "cached": False}
+    if kept:
+        audio = np.concatenate(kept)
+        if key:  # the cache always holds the 24 kHz WAV
+            with span.stage("wav_encode"):
+                b = await anyio.to_thread.run_sync(_wav_bytes_from_float32, audio, sr)
+            with span.stage("cache_write"):
+                await anyio.to_thread.run_sync(_tts_cache.put, key, b)
+        if inp.save_path:
+            with span.stage("encode"):
+                b = await anyio.to_thread.run_sync(_encode_audio, audio, sr, inp.format, inp.sample_rate)
+            with span.stage("disk_write"):
+                target = _safe_out_path(inp.save_path)
+                await anyio.to_thread.run_sync(_write_file, target, b)
+            out.update(_saved_file_fields(target))
+    return out
+
+@app.tool()
+async def synthesize_speech_stream(payload: dict, ctx: Context) -> dict:
+    """
+    Synthesize speech segment by segment. payload: {text, voice?, rate?, lang_code?, save_path?,
+                                                    timeout_sec?, format?, sample_rate?}
+    Each segment is sent as soon as Kokoro produces it, as a progress notification
+    whose message is JSON {index, sample_rate, audio_b64_wav} (or audio_b64 + format
+    for flac/opus, each segment a complete file). The result summarizes the
+    stream: {segments, sample_rate, format, duration_sec, audio_path?, audio_url?}.
+    """
+    with _instrumented("synthesize_speech_stream") as span:
+        inp = SynthesizeInput(**payload)
+        with span.stage("cache_lookup"):
+            key = _tts_cache.key(inp.text, inp.voice, inp.rate, inp.lang_code) if _tts_cache else None
+            b = await anyio.to_thread.run_sync(_tts_cache.get, key) if key else None
+        if b is not None:  # cached: the whole utterance is a single segment
+            span.audio_sec = sf.info(io.BytesIO(b)).duration
+            if inp.format != "wav" or inp.sample_rate != KOKORO_SAMPLE_RATE:
+                with span.stage("encode"):
+                    b = await anyio.to_thread.run_sync(_transcode_wav, b, inp.format, inp.sample_rate)
+            with span.stage("base64"):
+                message = json.dumps({"index": 0, "sample_rate": inp.sample_rate, **_audio_fields(b, inp.format)})
+            with span.stage("notify"):
+                await ctx.report_progress(1, 1, message=message)
+            out = {"segments": 1, "sample_rate": inp.sample_rate, "format": inp.format,
+                   "duration_sec": span.audio_sec, "cached": True}
+            if inp.save_path:
+                with span.stage("disk_write"):
+                    target = _safe_out_path(inp.save_path)
+                    await anyio.to_thread.run_sync(_write_file, target, b)
+                out.update(_saved_file_fields(target))
+        else:
+            with _tts_pool.request(), _deadline("synthesize_speech_stream", inp.timeout_sec):
+                out = await _stream_segments(inp, key, ctx, span)
+    return _with_timings(out, span)
+
+@app.tool()
+async def submit_job(payload: dict) -> dict:
+    """
+    Start a background synthesis/transcription and return at once.
+    payload: {kind: "tts" | "stt", priority?: "interactive" | "bulk" (default bulk), ...}
+    tts takes synthesize_speech's fields (audio goes to save_path or jobs/<id>.<wav|flac|opus>);
+    stt takes transcribe_long_audio's. Poll with job_status, stop with cancel_job.
+    Result: {job_id, status, position}
+    """
+    payload = dict(payload)
+    kind = payload.pop("kind", None)
+    priority = payload.pop("priority", "bulk")
+    job = _jobs.submit(kind, payload, priority)
+    return {"job_id": job.id, "status": job.status, "position": _jobs.position(job.id)}
+
+@app.tool()
+async def job_status(payload: dict) -> dict:
+    """
+    State of a job. payload: {job_id, wait_sec?}
+    wait_sec (<= 60) long-polls: returns as soon as the job finishes or after wait_sec.
+    Result: {id, kind, priority, status, progress, detail, result?, error?, created,
+             started, finished, position?}; result is set once status is "done"
+    (tts: audio_path/audio_uri of the wav/flac/opus file; stt: text, language, segments).
+    """
+    job_id = payload.get("job_id", "")
+    await _jobs.wait(job_id, min(float(payload.get("wait_sec") or 0), 60.0))
+    job = await _jobs.get(job_id)
+    if job is None:
+        raise ValueError(f"unknown job_id {job_id!r}")
+    out = job.public()
+    if job.status == "queued":
+        out["position"] = _jobs.position(job_id)
+    return out
+
+@app.tool()
+async def cancel_job(payload: dict) -> dict:
+    """Cancel a queued or running job. payload: {job_id}. Result: {job_id, status}"""
+    job_id = payload.get("job_id", "")
+    job = await _jobs.cancel(job_id)
+    if job is None:
+        raise ValueError(f"unknown job_id {job_id!r}")
+    return {"job_id": job_id, "status": job.status}
+
+@app.tool()
+def list_jobs(payload: dict) -> dict:
+    """Jobs held in memory (without results) and queue counters. payload: {status?}"""
+    status = payload.get("status")
+    jobs = [j for j in _jobs.list() if status is None or j["status"] == status]
+    return {"jobs": jobs, **_jobs.stats()}
+
+def _read_saved_audio(name: str) -> bytes:
+    with open(_path_from_audio_uri(AUDIO_URI_PREFIX + name), "rb") as f:
+        return f.read()
+
+# Templates are matched in registration order: the per-extension ones (for their
+# MIME types) must come before the catch-all WAV one.
+@app.resource(AUDIO_URI_PREFIX + "{name}.flac", mime_type="audio/flac")
+def saved_flac(name: str) -> bytes:
+    """A FLAC saved under TTS_DOWNLOAD_DIR; `name` is its URL-quoted relative path without ".flac"."""
+    return _read_saved_audio(name + ".flac")
+
+@app.resource(AUDIO_URI_PREFIX + "{name}.opus", mime_type="audio/ogg")
+def saved_opus(name: str) -> bytes:
+    """An Ogg/Opus file saved under TTS_DOWNLOAD_DIR; `name` is its URL-quoted relative path without ".opus"."""
+    return _read_saved_audio(name + ".opus")
+
+@app.resource(AUDIO_URI_PREFIX + "{name}.ogg", mime_type="audio/ogg")
+def saved_ogg(name: str) -> bytes:
+    """An Ogg/Opus file saved as .ogg under TTS_DOWNLOAD_DIR; `name` is its URL-quoted relative path without ".ogg"."""
+    return _read_saved_audio(name + ".ogg")
+
+@app.resource(AUDIO_URI_PREFIX + "{name}", mime_type="audio/wav")
+def saved_audio(name: str) -> bytes:
+    """A WAV saved under TTS_DOWNLOAD_DIR; `name` is its URL-quoted relative path."""
+    return _read_saved_audio(name)
+
+@app.tool()
+def tts_cache_stats(payload: dict) -> dict:
+    """
+    TTS cache size and hit/miss counters, plus the in-memory sentence memos
+    under `sentence_memo` (g2p: phonemes, segments: audio). payload: {clear?: bool}
+    """
+    if payload.get("clear"):
+        _g2p_memo.clear()
+        _segment_memo.clear()
+    if _tts_cache is None:
+        return {"enabled": False, "sentence_memo": _sentence_memo_stats()}
+    if payload.get("clear"):
+        _tts_cache.clear()
+    return {**_tts_cache.stats(), "sentence_memo": _sentence_memo_stats()}
+
+@app.tool()
+async def list_voices(payload: dict) -> dict:
+    """
+    Kokoro voices (listed from the model repo, or the built-in v1.0 list offline).
+    payload: {lang_code?} keeps one language's voices.
+    Result: {backend, voices: [names], details: [{name, lang_code, language, gender, loaded}],
+             default_voice, lang_code, languages, loaded_languages, voice_cache}
+    Pass any listed voice to synthesize_speech; lang_code defaults to its first letter.
+    """
+    lang = payload.get("lang_code")
+    lang = _lang_for(None, lang) if lang else None
+    names = await anyio.to_thread.run_sync(_voice_catalog)  # first call may hit the network
+    names = [n for n in names if lang is None or n[:1] == lang]
+    loaded = set(_voices.loaded())
+    details = [{"name": n, "lang_code": n[:1], "language": KOKORO_LANGUAGES.get(n[:1]),
+                "gender": {"f": "female", "m": "male"}.get(n[1:2]), "loaded": n in loaded}
+               for n in names]
+    return {
+        "backend": "kokoro",
+        "voices": names,
+        "details": details,
+        "default_voice": KOKORO_DEFAULT_VOICE,
+        "lang_code": KOKORO_LANG_CODE,
+        "languages": KOKORO_LANGUAGES,
+        "loaded_languages": sorted(_kokoro),
+        "voice_cache": _voices.stats(),
+    }
+
+@app.tool()
+def health(payload: dict) -> dict:
+    """Readiness: per-model load state and timings. `ready` is true once preloaded models are warm."""
+    preload = _preload_targets(SPEECH_PRELOAD)
+    models = {name: dict(state.__dict__) for name, state in _model_state.items()}
+    ready = all(_model_state[n].status == "ready" and _model_state[n].warmup_sec is not None
+                for n in preload)
+    return {
+        "ready": ready,
+        "backend": SPEECH_BACKEND,
+        "preload": preload,
+        "models": models,
+        "faster_whisper": {"model": FASTER_WHISPER_MODEL, "device": FASTER_WHISPER_DEVICE,
+                           "compute_type": FASTER_WHISPER_COMPUTE_TYPE, "cpu_threads": FASTER_WHISPER_THREADS},
+        "stt_batching": _stt_batcher.stats() if _stt_batcher else None,
+        "pools": {"stt": _stt_pool.stats(), "tts": _tts_pool.stats()},
+        "kokoro": {"languages": {lang: len(pipes) for lang, pipes in _kokoro.items()},
+                   "voice_cache": _voices.stats(), "sentence_memo": _sentence_memo_stats()},
+        "jobs": _jobs.stats(),
+        "request_timeout_sec": SPEECH_REQUEST_TIMEOUT_SEC,
+        "uptime_sec": time.time() - _STARTED_AT,
+    }
+
+@app.tool()
+def stats(payload: dict) -> dict:
+    """
+    Latency histograms per tool and per stage (decode, resample, model_load,
+    inference, wav_encode, base64, disk_write, ...), real-time factor and peak
+    RSS. payload: {format?: "json" | "prometheus", reset?: bool}
+    """
+    if payload.get("format") == "prometheus":
+        out = {"content_type": "text/plain; version=0.0.4", "text": _metrics.prometheus()}
+    else:
+        out = _metrics.snapshot()
+    if payload.get("reset"):
+        _metrics.reset()
+    return out
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MCP speech server (Kokoro TTS + faster-whisper STT)")
+    parser.add_argument("--preload", default=SPEECH_PRELOAD,
+                        help="tts, stt or all (comma-separated): load and warm models at launch")
+    parser.add_argument("--compute-type", default=FASTER_WHISPER_COMPUTE_TYPE,
+                        help="faster-whisper compute type, e.g. int8 or float32")
+    parser.add_argument("--threads", type=int, default=FASTER_WHISPER_THREADS,
+                        help="faster-whisper CPU threads (0 = library default)")
+    parser.add_argument("--backend", choices=["real", "stub"], default=SPEECH_BACKEND,
+                        help="stub: lightweight fake models for benchmarks and tests (no downloads)")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=MCP_TRANSPORT,
+                        help="http: serve Streamable HTTP at http://HOST:PORT/mcp so many clients share one server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    app.run()
+    args = _parse_args()
+    SPEECH_PRELOAD = args.preload
+    FASTER_WHISPER_COMPUTE_TYPE = args.compute_type
+    FASTER_WHISPER_THREADS = args.threads
+    SPEECH_BACKEND = args.backend
+    start_preload(SPEECH_PRELOAD)
+    if args.transport in {"http", "streamable-http"}:
+        import uvicorn
+        # Same app as stdio, served at /mcp; every client session shares the warm models and pools
+        uvicorn.run(app.streamable_http_app(), host=args.host, port=args.port, log_level="warning")
+    else:
+        app.run()
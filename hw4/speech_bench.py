@@ -0,0 +1,209 @@
+"""
+Speech benchmark: drives synthesize_speech and transcribe_audio through
+speech_mcp_client at several concurrency levels and input sizes.
+
+For each (tool, size, concurrency) it reports latency p50/p95, real-time
+factor (latency / audio seconds), requests/s and audio-seconds/s. The first
+call on a freshly launched server is reported separately as "cold" (server
+start + model load + first inference); everything after a warm-up call is
+"warm". At the end the server's own per-stage breakdown (`stats` tool) is
+printed.
+
+Run:
+  python speech_bench.py --backend stub                        # no model downloads
+  python speech_bench.py --tool tts --sentences 1,4,16 --concurrency 1,4 --requests 16
+  python speech_bench.py --tool stt --audio samples/isabela.wav --repeat 1,4 --max-inflight 4
+  python speech_bench.py --backend real --pool-size 2 --json > bench.json
+  python speech_bench.py --tool tts --format opus --sample-rate 16000   # compare payload KB with wav
+
+Env for the launched servers passes through (e.g. KOKORO_WORKERS, STT_BATCH_SIZE).
+"""
+
+from __future__ import annotations
+import argparse, base64, io, json, os, sys, time
+from typing import Dict, List, Optional
+
+import anyio
+import numpy as np
+import soundfile as sf
+
+SENTENCE = "The quick brown fox jumps over the lazy dog while the speech server keeps up."
+
+def make_text(sentences: int, salt: int = 0) -> str:
+    """`sentences` sentences of generated text; salt varies it so caches can't help."""
+    return " ".join(f"{SENTENCE} Number {salt}-{i}." for i in range(sentences))
+
+def make_audio(path: str, repeat: int) -> bytes:
+    """The WAV at `path` tiled `repeat` times, as WAV bytes."""
+    audio, sr = sf.read(path, dtype="float32")
+    if repeat > 1:
+        audio = np.concatenate([audio] * repeat)
+    bio = io.BytesIO()
+    sf.write(bio, audio, sr, subtype="PCM_16", format="WAV")
+    return bio.getvalue()
+
+def audio_seconds(res: Dict) -> Optional[float]:
+    """Duration of the audio in a synthesize_speech result (WAV, FLAC or Ogg/Opus)."""
+    b64 = res.get("audio_b64_wav") or res.get("audio_b64")
+    if not b64:
+        return None
+    return sf.info(io.BytesIO(base64.b64decode(b64))).duration
+
+def summarize(latencies: List[float], audio_sec: List[float], wall: float, errors: int,
+              payload_bytes: List[int]) -> Dict:
+    lat = np.array(latencies) if latencies else np.array([np.nan])
+    rtf = [l / a for l, a in zip(latencies, audio_sec) if a]
+    return {
+        "requests": len(latencies), "errors": errors,
+        "payload_kb_mean": float(np.mean(payload_bytes)) / 1024 if payload_bytes else None,
+        "p50_sec": float(np.percentile(lat, 50)), "p95_sec": float(np.percentile(lat, 95)),
+        "mean_sec": float(np.mean(lat)),
+        "rtf_mean": float(np.mean(rtf)) if rtf else None,
+        "req_per_sec": len(latencies) / wall if wall else None,
+        "audio_sec_per_sec": sum(audio_sec) / wall if wall else None,
+    }
+
+async def run_level(client, tool: str, make_call, n: int, concurrency: int) -> Dict:
+    """n calls of make_call(i) -> (audio seconds, response bytes) with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    audio_sec: List[float] = []
+    payload_bytes: List[int] = []
+    errors = 0
+    limit = anyio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with limit:
+            t0 = time.perf_counter()
+            try:
+                seconds, size = await make_call(i)
+            except Exception as e:
+                errors += 1
+                print(f"[bench] {tool} failed: {type(e).__name__}: {e}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - t0)
+            audio_sec.append(seconds or 0.0)
+            if size:
+                payload_bytes.append(size)
+
+    t0 = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for i in range(n):
+            tg.start_soon(one, i)
+    return summarize(latencies, audio_sec, time.perf_counter() - t0, errors, payload_bytes)
+
+async def bench(args) -> Dict:
+    from speech_mcp_client import SpeechClient  # after the env for the servers is set
+
+    results: Dict = {"backend": args.backend, "cold": {}, "warm": []}
+    max_conc = max(args.concurrency)
+    pool_size = args.pool_size
+    max_inflight = args.max_inflight or max(1, -(-max_conc // pool_size))
+    audio_cache: Dict[int, bytes] = {}
+    audio_len: Dict[int, float] = {}
+
+    def stt_input(repeat: int) -> bytes:
+        if repeat not in audio_cache:
+            audio_cache[repeat] = make_audio(args.audio, repeat)
+            audio_len[repeat] = sf.info(io.BytesIO(audio_cache[repeat])).duration
+        return audio_cache[repeat]
+
+    def tts_call(client, sentences: int, salt: int):
+        async def call(i: int):
+            res = await client.tts(make_text(sentences, salt * 100000 + i),
+                                   format=args.format, sample_rate=args.sample_rate)
+            return audio_seconds(res), len(res.get("audio_b64_wav") or res.get("audio_b64") or "")
+        return call
+
+    def stt_call(client, repeat: int):
+        b64 = base64.b64encode(stt_input(repeat)).decode("ascii")
+
+        async def call(i: int):
+            await client.stt(audio_b64=b64)
+            return audio_len[repeat], None
+        return call
+
+    tools = ["tts", "stt"] if args.tool == "both" else [args.tool]
+    t0 = time.perf_counter()
+    async with SpeechClient(pool_size=pool_size, max_inflight=max_inflight) as client:
+        results["cold"]["server_start_sec"] = time.perf_counter() - t0
+        for tool in tools:
+            # cold: first call pays the model load (unless the server preloads)
+            call = tts_call(client, 1, -1) if tool == "tts" else stt_call(client, 1)
+            t1 = time.perf_counter()
+            await call(0)
+            results["cold"][f"{tool}_first_call_sec"] = time.perf_counter() - t1
+            await call(1)  # warm-up
+
+        for tool in tools:
+            sizes = args.sentences if tool == "tts" else args.repeat
+            for size in sizes:
+                for conc in args.concurrency:
+                    if tool == "tts":
+                        call, label = tts_call(client, size, size * 1000 + conc), f"{size} sentences"
+                    else:
+                        call = stt_call(client, size)
+                        label = f"{audio_len[size]:.1f}s audio"
+                    row = await run_level(client, tool, call, args.requests, conc)
+                    row.update(tool=tool, size=label, concurrency=conc)
+                    results["warm"].append(row)
+                    if not args.json:
+                        print_row(row)
+        results["server_stats"] = await client.stats()
+    return results
+
+def print_row(row: Dict) -> None:
+    def f(v, fmt="{:.3f}"):
+        return "-" if v is None else fmt.format(v)
+    print(f"{row['tool']:<4} {row['size']:<14} c={row['concurrency']:<3} n={row['requests']:<4} "
+          f"err={row['errors']:<3} p50={f(row['p50_sec'])}s p95={f(row['p95_sec'])}s "
+          f"rtf={f(row['rtf_mean'])} {f(row['req_per_sec'], '{:.2f}')} req/s "
+          f"{f(row['audio_sec_per_sec'], '{:.1f}')} audio-s/s"
+          + (f" {row['payload_kb_mean']:.0f} KB/resp" if row.get("payload_kb_mean") else ""))
+
+def print_report(results: Dict) -> None:
+    print("\n=== cold ===")
+    for k, v in results["cold"].items():
+        print(f"  {k:<24} {v:.3f}s")
+    print("\n=== server stages (p50 s) ===")
+    for tool, t in results["server_stats"].get("tools", {}).items():
+        stages = ", ".join(f"{name}={h['p50']:.4f}" for name, h in t["stages_sec"].items() if h["p50"] is not None)
+        rtf = (t.get("rtf") or {}).get("p50")
+        print(f"  {tool}: n={t['requests']} rtf_p50={rtf if rtf is None else round(rtf, 4)}  {stages}")
+    peak = results["server_stats"].get("peak_rss_mb")
+    if peak is not None:
+        print(f"  server peak RSS: {peak:.0f} MB")
+
+def _int_list(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the MCP speech server (TTS/STT)")
+    p.add_argument("--backend", choices=["stub", "real"], default="stub",
+                   help="stub: fake models, no downloads; real: Kokoro + faster-whisper")
+    p.add_argument("--tool", choices=["tts", "stt", "both"], default="both")
+    p.add_argument("--concurrency", type=_int_list, default=[1, 4], help="e.g. 1,4,8")
+    p.add_argument("--requests", type=int, default=8, help="calls per (size, concurrency) level")
+    p.add_argument("--sentences", type=_int_list, default=[1, 8], help="TTS input sizes in sentences")
+    p.add_argument("--audio", default="samples/isabela.wav", help="STT input")
+    p.add_argument("--repeat", type=_int_list, default=[1, 4], help="STT input sizes: audio tiled N times")
+    p.add_argument("--pool-size", type=int, default=1, help="speech server processes")
+    p.add_argument("--max-inflight", type=int, default=0,
+                   help="calls per server (default: enough for the top concurrency)")
+    p.add_argument("--tts-cache", action="store_true", help="keep the server's TTS cache and sentence memos on")
+    p.add_argument("--format", choices=["wav", "flac", "opus"], default=None, help="TTS output codec")
+    p.add_argument("--sample-rate", type=int, default=None, help="TTS output sample rate")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    return p.parse_args(argv)
+
+if __name__ == "__main__":
+    args = _parse_args()
+    # read by the server processes speech_mcp_client launches
+    os.environ["SPEECH_BACKEND"] = args.backend
+    if not args.tts_cache:  # every request should pay for G2P and synthesis
+        os.environ.update(TTS_CACHE="0", KOKORO_SEGMENT_CACHE_MB="0", KOKORO_G2P_CACHE_SIZE="0")
+    results = anyio.run(bench, args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
@@ -1,76 +1,630 @@
 from __future__ import annotations
-import os, sys, json, anyio
-from typing import Any, Dict
+import os, sys, json, math, base64, queue, atexit, functools, threading, contextlib, anyio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
+from anyio.from_thread import BlockingPortal
 from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.client.streamable_http import streamablehttp_client
 from mcp.client.session import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
 
 # Launch command (unbuffered)
 MCP_SPEECH_CMD  = os.getenv("MCP_SPEECH_CMD", sys.executable)
 MCP_SPEECH_ARGS = os.getenv("MCP_SPEECH_ARGS", "-u mcp_speech_server.py").split()
 MCP_SPEECH_CWD  = os.getenv("MCP_SPEECH_CWD", os.getcwd())
+MCP_SPEECH_POOL_SIZE = int(os.getenv("MCP_SPEECH_POOL_SIZE", "1"))  # server processes kept warm
+MCP_SPEECH_MAX_INFLIGHT = int(os.getenv("MCP_SPEECH_MAX_INFLIGHT", "1"))  # concurrent calls per server
+# Shared server: e.g. http://127.0.0.1:8001/mcp (mcp_speech_server.py --transport http); unset = launch our own
+MCP_SPEECH_URL  = os.getenv("MCP_SPEECH_URL")
 SPEECH_DEBUG    = os.getenv("SPEECH_DEBUG") == "1"
 
-async def _call_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+INIT_TIMEOUT_SEC = 60
+CALL_TIMEOUT_SEC = float(os.getenv("MCP_SPEECH_CALL_TIMEOUT_SEC", "120"))  # longer work: submit_job
+JOB_FINAL_STATES = {"done", "error", "cancelled"}
+CLIENT_INFO = {"name": "you-agent", "version": "0.1.0"}
+
+def _server_params() -> StdioServerParameters:
     env = os.environ.copy()
     env["PYTHONUNBUFFERED"] = "1"
-
-    params = StdioServerParameters(
+    return StdioServerParameters(
         command=MCP_SPEECH_CMD,
         args=MCP_SPEECH_ARGS,
         cwd=MCP_SPEECH_CWD,
         env=env,
     )
+
+@contextlib.asynccontextmanager
+async def _open_streams():
+    """(read, write) streams to a server: MCP_SPEECH_URL over Streamable HTTP, else a fresh stdio subprocess."""
     if SPEECH_DEBUG:
-        print("[client] launching:", MCP_SPEECH_CMD, MCP_SPEECH_ARGS, "cwd=", MCP_SPEECH_CWD)
+        print("[client] connecting:", MCP_SPEECH_URL or f"{MCP_SPEECH_CMD} {MCP_SPEECH_ARGS} cwd={MCP_SPEECH_CWD}")
+    if MCP_SPEECH_URL:
+        async with streamablehttp_client(MCP_SPEECH_URL) as (read_stream, write_stream, _):
+            yield read_stream, write_stream
+    else:
+        async with stdio_client(_server_params()) as (read_stream, write_stream):
+            yield read_stream, write_stream
+
+class SpeechServerError(RuntimeError):
+    """The server answered a tool call with an error (bad input, model failure, ...)."""
+
+    def __init__(self, tool: str, message: str):
+        super().__init__(f"{tool}: {message}")
+        self.tool = tool
+        self.message = message
+
+class SpeechServerBusy(SpeechServerError):
+    """The server's queue was full and it did not start the call; back off and retry."""
+
+class SpeechServerTimeout(SpeechServerError):
+    """The call ran into its server-side deadline; retrying the same work is unlikely to help."""
+
+def _tool_error(tool: str, result) -> SpeechServerError:
+    text = " ".join(getattr(part, "text", "") for part in result.content).strip() or "unknown error"
+    if "retry later" in text:  # the server's ServerBusy
+        return SpeechServerBusy(tool, text)
+    if "timed out after" in text:  # its per-call deadline
+        return SpeechServerTimeout(tool, text)
+    return SpeechServerError(tool, text)
+
+def _first_json(result, tool: str = "tool") -> Dict[str, Any]:
+    """Extract the first JSON result from a CallToolResult; raise SpeechServerError if it is an error."""
+    if getattr(result, "isError", False):
+        raise _tool_error(tool, result)
+    for part in result.content:
+        t = getattr(part, "type", None)
+        if t == "json":
+            return getattr(part, "data", {}) or {}
+        if t == "text":
+            try:
+                return json.loads(part.text)
+            except Exception:
+                return {"text": part.text}
+    return {}
 
-    async with stdio_client(params) as (read_stream, write_stream):
+def _is_disconnect(exc: BaseException) -> bool:
+    if isinstance(exc, McpError):
+        return exc.error.code == CONNECTION_CLOSED
+    return isinstance(exc, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream))
+
+async def _call_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """One-shot call: launch a server (or connect to MCP_SPEECH_URL), call one tool, shut it down."""
+    async with _open_streams() as (read_stream, write_stream):
         async with ClientSession(
             read_stream=read_stream,
             write_stream=write_stream,
-            client_info={"name": "you-agent", "version": "0.1.0"},
+            client_info=CLIENT_INFO,
         ) as session:
-            with anyio.fail_after(60):
+            with anyio.fail_after(INIT_TIMEOUT_SEC):
                 if SPEECH_DEBUG:
                     print("[client] initialize() …")
                 await session.initialize()
 
-            with anyio.fail_after(120):
+            with anyio.fail_after(CALL_TIMEOUT_SEC):
                 if SPEECH_DEBUG:
                     print(f"[client] call_tool({tool_name}) … args={arguments}")
                 # FastMCP tool signature expects {"payload": {...}}
                 result = await session.call_tool(tool_name, arguments={"payload": arguments})
 
-    # Extract first JSON result
-    for part in result.content:
-        t = getattr(part, "type", None)
-        if t == "json":
-            return getattr(part, "data", {}) or {}
-        if t == "text":
-            try:
-                return json.loads(part.text)
-            except Exception:
-                return {"text": part.text}
-    return {}
+    return _first_json(result, tool_name)
 
-# Convenience wrappers
-def tts(text: str, *, voice: str | None = None, rate: float | None = None,
-        save_path: str | None = None) -> Dict[str, Any]:
+def _tts_payload(text: str, voice: str | None, rate: float | None,
+                 save_path: str | None, return_audio: bool = True,
+                 format: str | None = None, sample_rate: int | None = None,
+                 lang_code: str | None = None) -> Dict[str, Any]:
     payload: Dict[str, Any] = {"text": text}
     if voice is not None: payload["voice"] = voice
     if rate is not None: payload["rate"] = rate
     if save_path is not None: payload["save_path"] = save_path
-    return anyio.run(_call_tool, "synthesize_speech", payload)
+    if not return_audio: payload["return_audio"] = False
+    if format is not None: payload["format"] = format
+    if sample_rate is not None: payload["sample_rate"] = sample_rate
+    if lang_code is not None: payload["lang_code"] = lang_code
+    return payload
 
-def stt(*, audio_path: str | None = None, audio_b64: str | None = None,
-        language: str | None = None) -> Dict[str, Any]:
-    if not audio_path and not audio_b64:
-        raise ValueError("Provide audio_path or audio_b64")
+def audio_bytes(item: Dict[str, Any]) -> bytes | None:
+    """Decoded audio of a tts() result or tts_stream() segment, whatever its format."""
+    b64 = item.get("audio_b64_wav") or item.get("audio_b64")
+    return base64.b64decode(b64) if b64 else None
+
+def _stt_payload(audio_path: str | None, audio_b64: str | None,
+                 language: str | None, audio_uri: str | None = None) -> Dict[str, Any]:
+    if not audio_path and not audio_b64 and not audio_uri:
+        raise ValueError("Provide audio_path, audio_uri or audio_b64")
     payload: Dict[str, Any] = {}
     if audio_path: payload["audio_path"] = audio_path
+    if audio_uri: payload["audio_uri"] = audio_uri
     if audio_b64: payload["audio_b64"] = audio_b64
     if language: payload["language"] = language
-    return anyio.run(_call_tool, "transcribe_audio", payload)
+    return payload
+
+# ---------- Persistent, pooled client ----------
+class _Connection:
+    """One long-lived server process (or session on the MCP_SPEECH_URL server)
+    with an initialized ClientSession.
+
+    The transport/session context managers are owned by a dedicated task so they
+    are entered and exited in the same task, as anyio requires.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self._stop = anyio.Event()
+        self._done = anyio.Event()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and not self._done.is_set()
+
+    async def run(self, *, task_status=anyio.TASK_STATUS_IGNORED) -> None:
+        started = False
+        try:
+            async with _open_streams() as (read_stream, write_stream):
+                async with ClientSession(
+                    read_stream=read_stream,
+                    write_stream=write_stream,
+                    client_info=CLIENT_INFO,
+                ) as session:
+                    with anyio.fail_after(INIT_TIMEOUT_SEC):
+                        await session.initialize()
+                    self.session = session
+                    started = True
+                    task_status.started()
+                    await self._stop.wait()
+        except Exception as e:
+            if not started:
+                raise
+            # server died after startup; the pool reconnects on next use
+            if SPEECH_DEBUG:
+                print(f"[client] connection #{self.index} ended: {e!r}")
+        finally:
+            self.session = None
+            self._done.set()
+
+    async def close(self) -> None:
+        self._stop.set()
+        await self._done.wait()
+
+class SpeechClient:
+    """Async client that keeps `pool_size` warm speech servers and reuses them.
+
+    Usage:
+        async with SpeechClient(pool_size=2) as client:
+            await client.tts("hello", save_path="speech/hello.wav")
+
+    Each server takes up to `max_inflight` concurrent calls (default 1; raise it
+    so the server can micro-batch, see STT_BATCH_SIZE); further callers wait
+    for a free slot. A connection whose server died is relaunched and the call
+    is retried once. With MCP_SPEECH_URL set, the "servers" are sessions on one
+    shared HTTP server, which queues and limits model work itself.
+    """
+
+    def __init__(self, pool_size: int | None = None, max_inflight: int | None = None):
+        self.pool_size = max(1, pool_size or MCP_SPEECH_POOL_SIZE)
+        self.max_inflight = max(1, max_inflight or MCP_SPEECH_MAX_INFLIGHT)
+        self._tg = None
+        self._conns: Dict[int, _Connection] = {}
+        self._locks: Dict[int, anyio.Lock] = {}
+        self._idle_send = self._idle_recv = None
+
+    async def __aenter__(self) -> "SpeechClient":
+        self._tg = anyio.create_task_group()
+        await self._tg.__aenter__()
+        slots = self.pool_size * self.max_inflight
+        self._idle_send, self._idle_recv = anyio.create_memory_object_stream(slots)
+        try:
+            for i in range(self.pool_size):
+                self._locks[i] = anyio.Lock()
+                await self._connect(i)
+            for _ in range(self.max_inflight):  # interleave so load spreads across servers
+                for i in range(self.pool_size):
+                    self._idle_send.send_nowait(i)
+        except BaseException as e:
+            await self.__aexit__(type(e), e, e.__traceback__)
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> Optional[bool]:
+        for conn in self._conns.values():
+            conn._stop.set()  # let each server shut down cleanly
+        try:
+            return await self._tg.__aexit__(*exc_info)
+        finally:
+            self._idle_send.close()
+            self._idle_recv.close()
+            self._tg = None
+
+    async def _connect(self, index: int) -> _Connection:
+        conn = _Connection(index)
+        await self._tg.start(conn.run)
+        self._conns[index] = conn
+        return conn
+
+    async def _replace(self, index: int, dead: _Connection) -> None:
+        """Relaunch server `index` unless another caller already did."""
+        async with self._locks[index]:
+            if self._conns[index] is dead:
+                with anyio.move_on_after(5):
+                    await dead.close()
+                await self._connect(index)
+
+    async def _request(self, fn, timeout: float | None):
+        """Run `fn(session)` on a free connection slot, relaunching a dead server once."""
+        if self._tg is None:
+            raise RuntimeError("SpeechClient is not open; use `async with SpeechClient()`")
+        index = await self._idle_recv.receive()
+        try:
+            for attempt in (0, 1):
+                conn = self._conns[index]
+                if not conn.alive:
+                    await self._replace(index, conn)
+                    conn = self._conns[index]
+                try:
+                    with anyio.fail_after(timeout):
+                        return await fn(conn.session)
+                except Exception as e:
+                    if attempt or not _is_disconnect(e):
+                        raise
+                    await self._replace(index, conn)
+        finally:
+            self._idle_send.send_nowait(index)
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], *,
+                        timeout: float | None = CALL_TIMEOUT_SEC,
+                        progress_callback=None) -> Dict[str, Any]:
+        async def call(session: ClientSession):
+            if SPEECH_DEBUG:
+                print(f"[client] call_tool({tool_name}) … args={arguments}")
+            # FastMCP tool signature expects {"payload": {...}}
+            return await session.call_tool(tool_name, arguments={"payload": arguments},
+                                           progress_callback=progress_callback)
+
+        return _first_json(await self._request(call, timeout), tool_name)
+
+    async def read_audio(self, audio_uri: str, *, timeout: float | None = CALL_TIMEOUT_SEC) -> bytes:
+        """Fetch the WAV bytes behind an `audio_uri` returned by the server."""
+        result = await self._request(lambda session: session.read_resource(audio_uri), timeout)
+        for part in result.contents:
+            blob = getattr(part, "blob", None)
+            if blob is not None:
+                return base64.b64decode(blob)
+        raise ValueError(f"No binary content for {audio_uri}")
+
+    async def tts(self, text: str, *, voice: str | None = None, rate: float | None = None,
+                  save_path: str | None = None, return_audio: bool = True,
+                  format: str | None = None, sample_rate: int | None = None,
+                  lang_code: str | None = None) -> Dict[str, Any]:
+        """return_audio=False skips the base64 body; use audio_path/audio_uri instead.
+
+        format "flac" or "opus" (Ogg/Opus) with e.g. sample_rate=16000 shrinks the
+        payload; the audio then comes back as audio_b64 instead of audio_b64_wav.
+        lang_code defaults to the voice's first letter (bf_emma -> "b").
+        """
+        payload = _tts_payload(text, voice, rate, save_path, return_audio, format, sample_rate, lang_code)
+        return await self.call_tool("synthesize_speech", payload)
+
+    async def tts_stream(self, text: str, *, voice: str | None = None, rate: float | None = None,
+                         save_path: str | None = None, format: str | None = None,
+                         sample_rate: int | None = None, lang_code: str | None = None,
+                         timeout: float | None = CALL_TIMEOUT_SEC) -> AsyncIterator[Dict[str, Any]]:
+        """Yield {index, sample_rate, audio_b64_wav} segments as the server synthesizes them
+        (audio_b64 + format for flac/opus).
+
+        The last item is the tool result with `done: True` (segments, duration_sec,
+        audio_path?, audio_url?).
+        """
+        payload = _tts_payload(text, voice, rate, save_path, format=format, sample_rate=sample_rate,
+                               lang_code=lang_code)
+        async for item in self._stream_tool("synthesize_speech_stream", payload, timeout):
+            yield item
+
+    async def _stream_tool(self, name: str, payload: Dict[str, Any],
+                           timeout: float | None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the JSON progress messages of a streaming tool, then {"done": True, **result}."""
+        send, recv = anyio.create_memory_object_stream(math.inf)
+
+        async def on_progress(progress: float, total: float | None, message: str | None) -> None:
+            if message:
+                send.send_nowait(json.loads(message))
+
+        async def run() -> None:
+            async with send:
+                result = await self.call_tool(name, payload, timeout=timeout,
+                                              progress_callback=on_progress)
+                send.send_nowait({"done": True, **result})
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(run)
+            async with recv:
+                async for item in recv:
+                    yield item
+
+    async def stt(self, *, audio_path: str | None = None, audio_b64: str | None = None,
+                  language: str | None = None, audio_uri: str | None = None) -> Dict[str, Any]:
+        payload = _stt_payload(audio_path, audio_b64, language, audio_uri)
+        return await self.call_tool("transcribe_audio", payload)
+
+    async def stt_long_stream(self, *, audio_path: str | None = None, audio_b64: str | None = None,
+                              language: str | None = None, audio_uri: str | None = None,
+                              timeout: float | None = None, **options) -> AsyncIterator[Dict[str, Any]]:
+        """Yield {index, start, end, text, segments} per chunk of a long recording, in order.
+
+        The last item is the tool result with `done: True` (text, language,
+        duration_sec, chunks, segments). `options` go to transcribe_long_audio
+        (max_chunk_sec, min_silence_ms, workers, ...). No timeout by default:
+        long files can take a while.
+        """
+        payload = {**_stt_payload(audio_path, audio_b64, language, audio_uri), **options}
+        async for item in self._stream_tool("transcribe_long_audio", payload, timeout):
+            yield item
+
+    async def stt_long(self, **kwargs) -> Dict[str, Any]:
+        """Transcript of a long recording (see stt_long_stream)."""
+        result: Dict[str, Any] = {}
+        async for item in self.stt_long_stream(**kwargs):
+            result = item
+        result.pop("done", None)
+        return result
+
+    async def list_voices(self, *, lang_code: str | None = None) -> Dict[str, Any]:
+        return await self.call_tool("list_voices", {"lang_code": lang_code} if lang_code else {})
+
+    async def health(self) -> Dict[str, Any]:
+        return await self.call_tool("health", {})
+
+    async def tts_cache_stats(self, *, clear: bool = False) -> Dict[str, Any]:
+        return await self.call_tool("tts_cache_stats", {"clear": clear})
+
+    async def stats(self, *, prometheus: bool = False, reset: bool = False) -> Dict[str, Any]:
+        """Per-tool/stage latency histograms, RTF and peak RSS (or Prometheus text under "text")."""
+        return await self.call_tool("stats", {"format": "prometheus" if prometheus else "json",
+                                              "reset": reset})
+
+    async def submit_job(self, kind: str, *, priority: str = "bulk", **payload) -> Dict[str, Any]:
+        """Start a background "tts" or "stt" job; returns {job_id, status, position} at once.
+
+        `payload` holds synthesize_speech fields (tts) or transcribe_long_audio
+        fields (stt). "bulk" jobs yield to "interactive" work on the server.
+        """
+        return await self.call_tool("submit_job", {"kind": kind, "priority": priority, **payload})
+
+    async def job_status(self, job_id: str, *, wait_sec: float = 0) -> Dict[str, Any]:
+        """Job state, progress and (once done) result; wait_sec long-polls up to 60 s."""
+        return await self.call_tool("job_status", {"job_id": job_id, "wait_sec": wait_sec})
+
+    async def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        return await self.call_tool("cancel_job", {"job_id": job_id})
+
+    async def list_jobs(self, *, status: str | None = None) -> Dict[str, Any]:
+        return await self.call_tool("list_jobs", {"status": status} if status else {})
+
+    async def wait_job(self, job_id: str, *, poll_sec: float = 10, timeout: float | None = None,
+                       on_progress=None) -> Dict[str, Any]:
+        """Poll until the job is done, failed or cancelled and return its final status.
+
+        on_progress(status) is called after every poll. Each poll holds a
+        connection slot for up to poll_sec. An unknown job id raises
+        SpeechServerError from the first poll.
+        """
+        with anyio.fail_after(timeout):
+            while True:
+                status = await self.job_status(job_id, wait_sec=poll_sec)
+                if on_progress is not None:
+                    on_progress(status)
+                if status.get("status") in JOB_FINAL_STATES:
+                    return status
+
+class SyncSpeechClient:
+    """Blocking facade over SpeechClient.
+
+    Runs the async client on an event loop in a background daemon thread, so
+    it can be shared by plain synchronous code and by multiple threads.
+    """
+
+    def __init__(self, pool_size: int | None = None, max_inflight: int | None = None):
+        self._client = SpeechClient(pool_size=pool_size, max_inflight=max_inflight)
+        self._lock = threading.Lock()
+        self._portal: Optional[BlockingPortal] = None
+        self._cm = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "SyncSpeechClient":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def client(self) -> SpeechClient:
+        return self._client
+
+    def start(self) -> "SyncSpeechClient":
+        with self._lock:
+            if self._portal is not None:
+                return self
+            ready = threading.Event()
+            box: List[BlockingPortal] = []
+
+            async def _serve() -> None:
+                async with BlockingPortal() as portal:
+                    box.append(portal)
+                    ready.set()
+                    await portal.sleep_until_stopped()
+
+            self._thread = threading.Thread(target=anyio.run, args=(_serve,),
+                                            name="speech-mcp-client", daemon=True)
+            self._thread.start()
+            ready.wait()
+            portal = box[0]
+            cm = portal.wrap_async_context_manager(self._client)
+            try:
+                cm.__enter__()
+            except BaseException:
+                portal.call(portal.stop)
+                self._thread.join()
+                raise
+            self._portal, self._cm = portal, cm
+            return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._portal is None:
+                return
+            try:
+                self._cm.__exit__(None, None, None)
+            finally:
+                self._portal.call(self._portal.stop)
+                self._thread.join(timeout=10)
+                self._portal = self._cm = self._thread = None
+
+    def _run(self, fn, *args, **kwargs):
+        self.start()
+        return self._portal.call(functools.partial(fn, *args, **kwargs))
+
+    def call_tool(self, tool_name: str, arguments: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.call_tool, tool_name, arguments, **kwargs)
+
+    def tts(self, text: str, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.tts, text, **kwargs)
+
+    def tts_stream(self, text: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        return self._iterate(self._client.tts_stream, text, **kwargs)
+
+    def _iterate(self, stream, *args, **kwargs) -> Iterator[Dict[str, Any]]:
+        self.start()
+        items: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                async for item in stream(*args, **kwargs):
+                    items.put(item)
+            finally:
+                items.put(done)
+
+        future = self._portal.start_task_soon(pump)
+        while (item := items.get()) is not done:
+            yield item
+        future.result()  # re-raise errors from the stream
+
+    def stt(self, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.stt, **kwargs)
+
+    def stt_long_stream(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        return self._iterate(self._client.stt_long_stream, **kwargs)
+
+    def stt_long(self, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.stt_long, **kwargs)
+
+    def read_audio(self, audio_uri: str, **kwargs) -> bytes:
+        return self._run(self._client.read_audio, audio_uri, **kwargs)
+
+    def list_voices(self, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.list_voices, **kwargs)
+
+    def health(self) -> Dict[str, Any]:
+        return self._run(self._client.health)
+
+    def tts_cache_stats(self, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.tts_cache_stats, **kwargs)
+
+    def stats(self, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.stats, **kwargs)
+
+    def submit_job(self, kind: str, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.submit_job, kind, **kwargs)
+
+    def job_status(self, job_id: str, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.job_status, job_id, **kwargs)
+
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        return self._run(self._client.cancel_job, job_id)
+
+    def list_jobs(self, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.list_jobs, **kwargs)
+
+    def wait_job(self, job_id: str, **kwargs) -> Dict[str, Any]:
+        return self._run(self._client.wait_job, job_id, **kwargs)
+
+_default_client: Optional[SyncSpeechClient] = None
+_default_lock = threading.Lock()
+
+def get_client() -> SyncSpeechClient:
+    """Process-wide SyncSpeechClient used by the convenience wrappers."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = SyncSpeechClient()
+            atexit.register(_default_client.close)
+        return _default_client
+
+# Convenience wrappers (share one warm server across calls)
+def tts(text: str, *, voice: str | None = None, rate: float | None = None,
+        save_path: str | None = None, return_audio: bool = True,
+        format: str | None = None, sample_rate: int | None = None,
+        lang_code: str | None = None) -> Dict[str, Any]:
+    return get_client().tts(text, voice=voice, rate=rate, save_path=save_path,
+                            return_audio=return_audio, format=format, sample_rate=sample_rate,
+                            lang_code=lang_code)
+
+def tts_stream(text: str, *, voice: str | None = None, rate: float | None = None,
+               save_path: str | None = None, format: str | None = None,
+               sample_rate: int | None = None, lang_code: str | None = None) -> Iterator[Dict[str, Any]]:
+    """Iterate over synthesized segments as they arrive (see SpeechClient.tts_stream)."""
+    return get_client().tts_stream(text, voice=voice, rate=rate, save_path=save_path,
+                                   format=format, sample_rate=sample_rate, lang_code=lang_code)
+
+def stt(*, audio_path: str | None = None, audio_b64: str | None = None,
+        language: str | None = None, audio_uri: str | None = None) -> Dict[str, Any]:
+    _stt_payload(audio_path, audio_b64, language, audio_uri)  # validate before starting a server
+    return get_client().stt(audio_path=audio_path, audio_b64=audio_b64, language=language,
+                            audio_uri=audio_uri)
+
+def stt_long(*, audio_path: str | None = None, audio_b64: str | None = None,
+             language: str | None = None, audio_uri: str | None = None, **options) -> Dict[str, Any]:
+    """Transcribe a long recording in VAD-cut chunks (see SpeechClient.stt_long_stream)."""
+    _stt_payload(audio_path, audio_b64, language, audio_uri)
+    return get_client().stt_long(audio_path=audio_path, audio_b64=audio_b64, language=language,
+                                 audio_uri=audio_uri, **options)
+
+def stt_long_stream(*, audio_path: str | None = None, audio_b64: str | None = None,
+                    language: str | None = None, audio_uri: str | None = None,
+                    **options) -> Iterator[Dict[str, Any]]:
+    """Iterate over timestamped chunks as they are transcribed, then the final result."""
+    return get_client().stt_long_stream(audio_path=audio_path, audio_b64=audio_b64, language=language,
+                                        audio_uri=audio_uri, **options)
+
+def read_audio(audio_uri: str) -> bytes:
+    return get_client().read_audio(audio_uri)
+
+def list_voices(*, lang_code: str | None = None) -> Dict[str, Any]:
+    """Voice catalog of the server; lang_code keeps one language (e.g. "b" British English)."""
+    return get_client().list_voices(lang_code=lang_code)
+
+def health() -> Dict[str, Any]:
+    """Model load state and timings of the speech server (see SPEECH_PRELOAD / --preload)."""
+    return get_client().health()
+
+def tts_cache_stats(*, clear: bool = False) -> Dict[str, Any]:
+    return get_client().tts_cache_stats(clear=clear)
+
+def stats(*, prometheus: bool = False, reset: bool = False) -> Dict[str, Any]:
+    """Latency/RTF/memory stats of the speech server (see the `stats` tool)."""
+    return get_client().stats(prometheus=prometheus, reset=reset)
+
+def submit_job(kind: str, *, priority: str = "bulk", **payload) -> Dict[str, Any]:
+    """Background "tts"/"stt" job for inputs too long for one call; returns its job_id at once."""
+    return get_client().submit_job(kind, priority=priority, **payload)
+
+def job_status(job_id: str, *, wait_sec: float = 0) -> Dict[str, Any]:
+    return get_client().job_status(job_id, wait_sec=wait_sec)
+
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    return get_client().cancel_job(job_id)
 
-def list_voices() -> Dict[str, Any]:
-    return anyio.run(_call_tool, "list_voices", {})
+def wait_job(job_id: str, *, poll_sec: float = 10, timeout: float | None = None,
+             on_progress=None) -> Dict[str, Any]:
+    """Block until the job finishes (see SpeechClient.wait_job)."""
+    return get_client().wait_job(job_id, poll_sec=poll_sec, timeout=timeout, on_progress=on_progress)
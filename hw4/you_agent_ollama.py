@@ -2,17 +2,33 @@
 # deps: crewai, pydantic, langchain (indirect), plus your existing MCP speech client (tts/stt)
 # make sure Ollama is running and you've pulled a model (e.g. llama3.1:8b-instruct or deepseek-r1)
 
+import argparse
+import io
+import json
 import os
+import queue
 import re
-from typing import List
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import anyio
+import httpx
 from pydantic import BaseModel
 from crewai import Agent, Task, LLM
-from speech_mcp_client import tts, stt  # your MCP speech client
+from speech_mcp_client import SpeechServerBusy, SpeechServerError, audio_bytes, tts, stt  # your MCP speech client
+from llm_cache import cached_completion, get_cache  # opt-in answer cache (LLM_CACHE=1)
 
 # ------------- LLM via Ollama -------------
 # Tip: to reduce <think> blocks, try: OLLAMA_MODEL="ollama/llama3.1:8b-instruct"
 LLM_MODEL = os.getenv("OLLAMA_MODEL", "ollama/deepseek-r1")
-llm = LLM(model=LLM_MODEL, base_url="http://localhost:11434", temperature=0.3)
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+LLM_TEMPERATURE = 0.3
+llm = LLM(model=LLM_MODEL, base_url=OLLAMA_BASE_URL, temperature=LLM_TEMPERATURE)
 
 # ------------- Persona -------------
 class Persona(BaseModel):
@@ -84,6 +100,116 @@ def clean_for_tts(text: str) -> str:
     s = re.sub(r"\s+\n", "\n", s).strip()              # tidy whitespace
     return s
 
+# Line labels dropped by clean_for_tts, checked while a line is still arriving
+LABEL_RE = re.compile(r"\s*(outline|summary|raw|output\s*format)\s*:", re.IGNORECASE)
+LABEL_PREFIXES = ("outline:", "summary:", "raw:", "outputformat:")
+
+class StreamCleaner:
+    """Incremental clean_for_tts: feed LLM tokens, get back speakable text.
+
+    Drops <think>…</think> and ```fenced``` blocks even when a tag is split
+    across tokens, and label lines like "Summary: …". Only the tail that could
+    still turn into a tag or label is held back.
+    """
+    MARKERS = {"<think>": "</think>", "```": "```"}
+
+    def __init__(self):
+        self._buf = ""
+        self._closing = None     # end marker we're skipping to, if inside a block
+        self._line = ""          # start of the current line, while it might be a label
+        self._line_state = "start"  # start | keep | drop
+
+    def feed(self, chunk: str) -> str:
+        self._buf += chunk
+        out = []
+        while self._buf:
+            lower = self._buf.lower()
+            if self._closing:
+                end = lower.find(self._closing)
+                if end < 0:
+                    # Keep just enough to spot a closing tag split across tokens
+                    self._buf = self._buf[-(len(self._closing) - 1):]
+                    break
+                self._buf = self._buf[end + len(self._closing):]
+                self._closing = None
+                continue
+
+            hits = [(lower.find(m), m) for m in self.MARKERS if m in lower]
+            if hits:
+                start, marker = min(hits)
+                out.append(self._filter_lines(self._buf[:start]))
+                self._buf = self._buf[start + len(marker):]
+                self._closing = self.MARKERS[marker]
+                continue
+
+            hold = self._partial_marker_len(lower)
+            out.append(self._filter_lines(self._buf[:len(self._buf) - hold]))
+            self._buf = self._buf[len(self._buf) - hold:]
+            break
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Release whatever is left once the stream ends (an unclosed block is dropped)."""
+        tail = "" if self._closing else self._buf
+        self._buf, self._closing = "", None
+        out = self._filter_lines(tail)
+        if self._line_state == "start" and not LABEL_RE.match(self._line):
+            out += self._line
+        self._line, self._line_state = "", "start"
+        return out
+
+    def _partial_marker_len(self, lower: str) -> int:
+        for n in range(min(len(lower), max(map(len, self.MARKERS)) - 1), 0, -1):
+            if any(m.startswith(lower[-n:]) for m in self.MARKERS):
+                return n
+        return 0
+
+    def _filter_lines(self, text: str) -> str:
+        out = []
+        for piece in re.split(r"(\n)", text):
+            if piece == "\n":
+                if self._line_state == "start":
+                    out.append(self._line)
+                if self._line_state != "drop":
+                    out.append("\n")
+                self._line, self._line_state = "", "start"
+            elif self._line_state == "keep":
+                out.append(piece)
+            elif self._line_state == "start":
+                self._line += piece
+                if LABEL_RE.match(self._line):
+                    self._line_state = "drop"
+                    self._line = ""
+                else:
+                    squashed = re.sub(r"\s+", "", self._line).lower()
+                    if not any(p.startswith(squashed) for p in LABEL_PREFIXES):
+                        out.append(self._line)
+                        self._line, self._line_state = "", "keep"
+        return "".join(out)
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+
+class SentenceSplitter:
+    """Cut streamed text at sentence ends; pieces shorter than min_chars are merged."""
+
+    def __init__(self, min_chars: int = 40):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buf += text
+        sentences, start = [], 0
+        for m in SENTENCE_END_RE.finditer(self._buf):
+            if m.end() - start >= self.min_chars:
+                sentences.append(self._buf[start:m.end()].strip())
+                start = m.end()
+        self._buf = self._buf[start:]
+        return [s for s in sentences if s]
+
+    def flush(self) -> List[str]:
+        rest, self._buf = self._buf.strip(), ""
+        return [rest] if rest else []
+
 def to_text(task_out) -> str:
     """Extract a string from CrewAI TaskOutput across versions."""
     for attr in ("output", "raw_output", "raw", "result", "final_output"):
@@ -92,28 +218,271 @@ def to_text(task_out) -> str:
             return v
     return str(task_out)
 
+# ------------- Streaming LLM -> TTS -------------
+def task_messages(task: Task, agent: Agent) -> List[dict]:
+    """Chat messages equivalent to the CrewAI task, for calling Ollama directly."""
+    return [
+        {"role": "system", "content": f"{agent.backstory}\n\nYOUR GOAL: {agent.goal}"},
+        {"role": "user", "content": f"{task.description}\n\nExpected output: {task.expected_output}"},
+    ]
+
+def stream_ollama(messages: List[dict]) -> Iterator[str]:
+    """Yield content tokens from Ollama's /api/chat as they are generated."""
+    model = LLM_MODEL.split("/", 1)[1] if LLM_MODEL.startswith("ollama/") else LLM_MODEL
+    body = {"model": model, "messages": messages, "stream": True,
+            "options": {"temperature": LLM_TEMPERATURE}}
+    with httpx.stream("POST", f"{OLLAMA_BASE_URL}/api/chat", json=body, timeout=None) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            token = (chunk.get("message") or {}).get("content")
+            if token:
+                yield token
+            if chunk.get("done"):
+                break
+
+def cached_stream(messages: List[dict]) -> Iterator[str]:
+    """stream_ollama, but a cached answer (LLM_CACHE=1) is yielded at once and a new one is stored."""
+    cache = get_cache()
+    if cache is None:
+        yield from stream_ollama(messages)
+        return
+    system, task = messages[0]["content"], messages[1]["content"]
+    hit = cache.get(LLM_MODEL, LLM_TEMPERATURE, system, task)
+    if hit is not None:
+        yield hit
+        return
+    tokens = []
+    for token in stream_ollama(messages):
+        tokens.append(token)
+        yield token
+    if "".join(tokens).strip():
+        cache.put(LLM_MODEL, LLM_TEMPERATURE, system, task, "".join(tokens))
+
+def run_task(task: Task, agent: Agent) -> str:
+    """Run a task through CrewAI; with LLM_CACHE=1 a repeated persona+task reuses the stored answer."""
+    system, prompt = (m["content"] for m in task_messages(task, agent))
+    return cached_completion(LLM_MODEL, LLM_TEMPERATURE, system, prompt,
+                             lambda: to_text(task.execute_sync(agent=agent)))
+
+def _tts_with_retry(text: str, attempts: int = 5, **kwargs) -> dict:
+    """tts(), backing off while the server is busy; {} (and a note on stderr) if it still fails.
+    A server-side timeout is not retried: the sentence already used its whole deadline."""
+    for attempt in range(attempts):
+        try:
+            return tts(text, **kwargs)
+        except SpeechServerBusy as e:
+            if attempt == attempts - 1:
+                print(f"[tts] gave up on {text[:40]!r}: {e}", file=sys.stderr)
+                return {}
+            time.sleep(min(8.0, 0.5 * 2 ** attempt))
+        except SpeechServerError as e:
+            print(f"[tts] skipped {text[:40]!r}: {e}", file=sys.stderr)
+            return {}
+    return {}
+
+def speak_streaming(tokens: Iterator[str], save_path: str = "speech/intro.wav",
+                    voice: str = "af_heart", rate: float = 1.0, play_cmd: str | None = None) -> dict:
+    """Clean and split tokens into sentences and synthesize each one while generation continues.
+
+    Sentences go to a single TTS worker thread (keeps them in order), saved by
+    the server as <save_path stem>_NN.wav; with play_cmd (e.g. "afplay") each
+    one is played as soon as it's ready. The parts are joined from the audio
+    the server returns, not from its paths, so this works with a remote
+    MCP_SPEECH_URL too.
+    """
+    stem, ext = os.path.splitext(save_path)
+    cleaner, splitter = StreamCleaner(), SentenceSplitter()
+    todo: queue.Queue = queue.Queue()
+    parts: List[str] = []
+    audio: List[bytes] = []
+    t0 = time.perf_counter()
+    first_audio: List[float] = []
+    tts_busy = [0.0]
+
+    def tts_worker():
+        player = None
+        while (sentence := todo.get()) is not None:
+            start = time.perf_counter()
+            res = _tts_with_retry(sentence, voice=voice, rate=rate, format="wav",
+                                  save_path=f"{stem}_{len(parts):02d}{ext}")
+            tts_busy[0] += time.perf_counter() - start
+            wav, ap = audio_bytes(res), res.get("audio_path")
+            if not wav or not ap:
+                continue
+            parts.append(ap)
+            audio.append(wav)
+            if not first_audio:
+                first_audio.append(time.perf_counter() - t0)
+            if play_cmd:
+                if not os.path.exists(ap):  # remote server: play a local copy
+                    ap = os.path.join(_local_dir(ap, save_path), os.path.basename(ap))
+                    with open(ap, "wb") as f:
+                        f.write(wav)
+                if player is not None:
+                    player.wait()
+                player = subprocess.Popen([play_cmd, ap])
+        if player is not None:
+            player.wait()
+
+    worker = threading.Thread(target=tts_worker, name="tts-stream", daemon=True)
+    worker.start()
+    text = []
+    try:
+        for token in tokens:
+            clean = cleaner.feed(token)
+            text.append(clean)
+            print(clean, end="", flush=True)
+            for sentence in splitter.feed(clean):
+                todo.put(sentence)
+        tail = cleaner.flush()
+        text.append(tail)
+        print(tail, flush=True)
+        for sentence in splitter.feed(tail) + splitter.flush():
+            todo.put(sentence)
+        llm_done = time.perf_counter() - t0
+    finally:
+        todo.put(None)
+        worker.join()
+
+    audio_path = os.path.join(_local_dir(parts[0], save_path), os.path.basename(save_path)) if parts else None
+    return {"text": clean_for_tts("".join(text)), "audio_path": join_wavs(audio, audio_path), "parts": parts,
+            "first_audio_sec": first_audio[0] if first_audio else None,
+            "llm_sec": llm_done, "tts_busy_sec": tts_busy[0]}
+
+def _local_dir(server_path: str, save_path: str) -> str:
+    """Where to write local audio: next to the server's file if that folder is here, else save_path's folder."""
+    folder = os.path.dirname(server_path)
+    if not os.path.isdir(folder):  # the server runs elsewhere (MCP_SPEECH_URL)
+        folder = os.path.dirname(os.path.abspath(save_path))
+        os.makedirs(folder, exist_ok=True)
+    return folder
+
+def join_wavs(parts: List[bytes], audio_path: Optional[str]) -> Optional[str]:
+    """Concatenate WAV parts (file bytes) into audio_path."""
+    if not parts or not audio_path:
+        return None
+    with wave.open(audio_path, "wb") as out:
+        for i, part in enumerate(parts):
+            with wave.open(io.BytesIO(part), "rb") as w:
+                if i == 0:
+                    out.setparams(w.getparams())
+                out.writeframes(w.readframes(w.getnframes()))
+    return audio_path
+
+# ------------- Async orchestration -------------
+class StageTimer:
+    """Wall-clock spans of pipeline stages, relative to when the timer was created."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans: Dict[str, Tuple[float, float]] = {}
+        self.marks: Dict[str, float] = {}
+
+    def now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    @contextmanager
+    def stage(self, name: str):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.spans[name] = (start, self.now())
+
+    def record(self, name: str, start: float, end: float) -> None:
+        self.spans[name] = (start, end)
+
+    def mark(self, name: str, at: float) -> None:
+        """A point in time worth reporting, e.g. when the first audio was ready."""
+        self.marks[name] = at
+
+    def report(self) -> str:
+        wall = self.now()
+        lines = [f"{'stage':<12}{'start':>8}{'end':>8}{'wall':>8}"]
+        for name, (start, end) in sorted(self.spans.items(), key=lambda kv: kv[1]):
+            lines.append(f"{name:<12}{start:>7.2f}s{end:>7.2f}s{end - start:>7.2f}s")
+        busy = sum(end - start for start, end in self.spans.values())
+        lines.append(f"{'total':<12}{0:>7.2f}s{wall:>7.2f}s{wall:>7.2f}s"
+                     f"   (stages sum to {busy:.2f}s; {max(0.0, busy - wall):.2f}s overlapped)")
+        for name, at in self.marks.items():
+            lines.append(f"{name} at {at:.2f}s")
+        return "\n".join(lines)
+
+async def run_agent(wav_path: str = "samples/isabela.wav", stream: bool = False,
+                    save_path: str = "speech/intro.wav", voice: str = "af_heart", rate: float = 1.0,
+                    play_cmd: str | None = None) -> dict:
+    """STT of wav_path runs alongside LLM -> TTS; per-stage wall times are in result["timer"].
+
+    The blocking stages run in worker threads and share the process-wide warm
+    speech server (speech_mcp_client.get_client), so nothing waits on another
+    stage it doesn't depend on. With stream=True, TTS starts on the first
+    sentence while the LLM is still generating (see speak_streaming).
+    """
+    timer = StageTimer()
+    result: dict = {"timer": timer}
+
+    async def transcribe():
+        with timer.stage("stt"):
+            res = await anyio.to_thread.run_sync(lambda: stt(audio_path=wav_path))
+        result["transcript"] = res.get("text", "") or ""
+        print("Speech to text:", result["transcript"])
+
+    async def generate_and_speak():
+        if stream:
+            start = timer.now()
+            res = await anyio.to_thread.run_sync(lambda: speak_streaming(
+                cached_stream(task_messages(about_task, you_agent)),
+                save_path=save_path, voice=voice, rate=rate, play_cmd=play_cmd))
+            timer.record("llm", start, start + res["llm_sec"])
+            if res["first_audio_sec"] is not None:
+                timer.mark("first_audio", start + res["first_audio_sec"])
+            timer.record("tts", start, timer.now())
+            result.update(text=res["text"], audio_path=res["audio_path"], tts_busy_sec=res["tts_busy_sec"])
+            return
+
+        with timer.stage("llm"):
+            text = await anyio.to_thread.run_sync(lambda: clean_for_tts(run_task(about_task, you_agent)))
+        print("\n=== ABOUT (clean) ===\n", text)
+        with timer.stage("tts"):
+            res = await anyio.to_thread.run_sync(lambda: tts(text, voice=voice, rate=rate, save_path=save_path,
+                                                                  format="wav", return_audio=False))
+        result.update(text=text, audio_path=res.get("audio_path"))
+
+    async with anyio.create_task_group() as tg:
+        if wav_path and os.path.exists(wav_path):
+            tg.start_soon(transcribe)
+        tg.start_soon(generate_and_speak)
+    return result
+
 # ------------- Main -------------
+def _parse_args():
+    p = argparse.ArgumentParser(description="Personal agent demo (Ollama + MCP speech)")
+    p.add_argument("--stream", action="store_true",
+                   help="Stream tokens from Ollama and synthesize sentence by sentence")
+    p.add_argument("--play", default=os.getenv("PLAY_CMD"),
+                   help="With --stream, play each sentence as it's ready (e.g. afplay, aplay)")
+    return p.parse_args()
+
 if __name__ == "__main__":
-    # (Optional) STT demo
-    wav_path = "samples/isabela.wav"
-    if os.path.exists(wav_path):
-        stt_res = stt(audio_path=wav_path)
-        transcript = stt_res.get("text", "") or ""
-        print("Speech to text:", transcript)
-
-    # 1) Generate the paragraph (text)
-    about_out = about_task.execute_sync(agent=you_agent)
-    about_text = clean_for_tts(to_text(about_out))
-    print("\n=== ABOUT (clean) ===\n", about_text)
-
-    # 2) Always synthesize to audio (speech)
-    res = tts(
-        about_text,
+    args = _parse_args()
+
+    if args.stream:
+        print("\n=== ABOUT (streaming) ===")
+    # (Optional) STT demo runs alongside generation; TTS follows the LLM
+    res = anyio.run(lambda: run_agent(
+        "samples/isabela.wav", stream=args.stream, save_path="speech/intro.wav",
         voice="af_heart",          # Kokoro voice id
         rate=1.0,
-        save_path="speech/intro.wav"
-    )
+        play_cmd=args.play and shutil.which(args.play),
+    ))
+
     ap = res.get("audio_path")
     print("\nAudio saved to:", ap)
     if ap and os.path.exists(ap):
         print("Tip: on macOS you can play it with:\n  afplay", ap)
+    print("\n=== Stage timings ===\n" + res["timer"].report())